@@ -7,27 +7,34 @@ import ctypes
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QTabWidget,QFileDialog
 )
-from PyQt5.QtCore import Qt, QSize, QThread, pyqtSignal
+from PyQt5.QtCore import Qt, QSize, QThread, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont, QIcon
 from PyQt5.QtSvg import QSvgWidget
 from qframelesswindow import FramelessMainWindow
 
-from titlebar import CustomTitleBar
+from titlebar import CustomTitleBar, EDITOR_STYLES
 from styles import DarkThemeStyles
 from file_explorer_widget import FileExplorerWidget
 from terminal_module import Terminal
 from projects import ProjectManager
 from cosmic_splitter import CosmicSplitter
 from voice_assistant_dock import VoiceAssistantDock
-from voice_detection_module import CombinedDetector
+from voice_engine_process import VoiceEngineProcess
+from audio_autotune import load_audio_settings
+from voice_commands import CommandGrammar
 from tabs_dictionary import tabs_dictionary
 from code_editor_widget import CodeEditorWidget
+import startup_profiler
 
 
 class DetectorThread(QThread):
-    keyword_detected = pyqtSignal()
+    keyword_detected = pyqtSignal(str)
     silence_detected = pyqtSignal()
-    transcription_ready = pyqtSignal(str)
+    partial_transcription = pyqtSignal(str)
+    transcription_ready = pyqtSignal(int, str)
+    transcription_failed = pyqtSignal(int, str)
+    command_recognized = pyqtSignal(int, object)
+    detector_failed = pyqtSignal(str)
 
     def __init__(self, detector):
         super().__init__()
@@ -35,29 +42,37 @@ class DetectorThread(QThread):
         self.stopped = False
 
     def run(self):
-        self.detector.start()
+        try:
+            # Loads the models on first use, off the GUI thread
+            self.detector.start()
+        except Exception as e:
+            self.detector_failed.emit(str(e))
+            return
         while not self.stopped:
-            if self.detector.keyword_detected.wait():
-                if self.stopped:
-                    break
-                self.keyword_detected.emit()
-
-                if self.detector.silence_detected.wait():
-                    if self.stopped:
-                        break
-                    audio_data = self.detector.get_audio_data()
-                    transcription = self.detector.transcribe_audio(audio_data)
-                    self.transcription_ready.emit(transcription)
-                    self.detector.reset_audio_data()
-
+            event, payload = self.detector.events.get()
+            if self.stopped or event == "stop":
+                break
+            if event == "keyword":
+                self.keyword_detected.emit(payload)
+            elif event == "silence":
                 self.silence_detected.emit()
-                self.detector.keyword_detected.clear()
-                self.detector.silence_detected.clear()
+            elif event == "partial":
+                self.partial_transcription.emit(payload)
+            elif event == "transcription":
+                job_id, transcription = payload
+                self.transcription_ready.emit(job_id, transcription)
+            elif event == "command":
+                job_id, match = payload
+                self.command_recognized.emit(job_id, match)
+            elif event == "error":
+                job_id, message = payload
+                self.transcription_failed.emit(job_id, message)
+            elif event == "input_error":
+                self.detector_failed.emit(payload)
 
     def stop(self):
         self.stopped = True
-        self.detector.keyword_detected.set()
-        self.detector.silence_detected.set()
+        self.detector.events.put(("stop", None))
 
 class SimpleIDE(FramelessMainWindow):
     def __init__(self,project_path):
@@ -98,11 +113,12 @@ class SimpleIDE(FramelessMainWindow):
         # Adding the tab widget to the vertical main splitter
         self.v_splitter.addWidget(self.tab_widget)
         # Create the custom terminal widget from terminal_module.py
-        self.terminal = Terminal(
-            parent=self,
-            initial_height=200,
-            theme='Monokai'
-        )
+        with startup_profiler.span("Terminal"):
+            self.terminal = Terminal(
+                parent=self,
+                initial_height=200,
+                theme='Monokai'
+            )
         # Add the terminal to the vertical splitter
         self.v_splitter.addWidget(self.terminal)
         # Set sizes for the vertical splitter
@@ -119,12 +135,67 @@ class SimpleIDE(FramelessMainWindow):
         self.voice_assistant_dock = VoiceAssistantDock(ide_instance=self)
         self.addDockWidget(Qt.RightDockWidgetArea, self.voice_assistant_dock)
 
-        # Initialize detector and thread
-        self.detector = CombinedDetector()
+        # Initialize detector and thread; models load on first use or when the dock is opened.
+        # The detector runs in its own process so transcription doesn't stall painting.
+        with startup_profiler.span("VoiceEngineProcess"):
+            # Chunk and buffer sizes measured by audio_autotune.py for this project, if any
+            self.detector = VoiceEngineProcess(streaming=True, **load_audio_settings(self.project_path))
+        self.detector.state_callback = self.voice_assistant_dock.model_state_changed.emit
+        # The engine owns the microphone; the wave visualizer gets its audio over the pipe
+        self.voice_assistant_dock.wave_background.set_audio_hub(self.detector.audio_hub)
+        self.detector.command_grammar = self.build_voice_commands()
+        self.watch_project_files()
         self.detector_thread = None
 
         self.tabs = tabs_dictionary()
 
+    def build_voice_commands(self):
+        """Vocabulary of the voice command fast path: menu actions plus a few IDE actions."""
+        grammar = CommandGrammar()
+        grammar.add_menu_actions(self.custom_titlebar.ide_menu_bar, exclude=("Aidee Assistant",))
+        grammar.add("open_file", ["open file {file}", "apri file {file}", "apri {file}"], self.add_file_to_tabs)
+        grammar.add("run_file", ["run file", "run current file", "esegui file", "esegui il file"],
+                    self.run_current_file)
+        grammar.add("close_tab", ["close tab", "chiudi scheda", "chiudi tab"], self.close_current_tab)
+        grammar.add("theme", ["theme {theme}", "tema {theme}"], self.change_style)
+        grammar.add("toggle_terminal", ["toggle terminal", "mostra terminale", "nascondi terminale"],
+                    self.terminal.toggle_terminal)
+        # Read on the grammar refresh thread: list_files walks the disk, not the Qt model
+        grammar.set_slot("file", lambda: {os.path.basename(path): path for path in self.file_explorer.list_files()})
+        grammar.set_slot("theme", {name: name for name in EDITOR_STYLES})
+        return grammar
+
+    def watch_project_files(self):
+        """Re-send the voice commands' file names when the project or its files change."""
+        # Bursts of changes (a checkout, expanding folders) end up in a single refresh
+        self.grammar_refresh_timer = QTimer(self)
+        self.grammar_refresh_timer.setSingleShot(True)
+        self.grammar_refresh_timer.setInterval(500)
+        self.grammar_refresh_timer.timeout.connect(self.detector.refresh_command_grammar)
+        model = self.file_explorer.model
+        model.rootPathChanged.connect(self.schedule_grammar_refresh)
+        model.rowsInserted.connect(self.schedule_grammar_refresh)
+        model.rowsRemoved.connect(self.schedule_grammar_refresh)
+        model.fileRenamed.connect(self.schedule_grammar_refresh)
+
+    def schedule_grammar_refresh(self, *args):
+        self.grammar_refresh_timer.start()
+
+    def current_file_path(self):
+        index = self.tab_widget.currentIndex()
+        if index < 0:
+            return None
+        return self.tabs.get_tab(self.tabs.get_tab_by_index(index + 1)).get("path")
+
+    def run_current_file(self):
+        path = self.current_file_path()
+        if path:
+            self.terminal.run_command(f'python "{path}"')
+
+    def close_current_tab(self):
+        if self.tab_widget.currentIndex() >= 0:
+            self.close_tab(self.tab_widget.currentIndex())
+
     def change_style(self, style_name="monokai"):
         self.current_style = style_name
         for index in range(self.tab_widget.count()):
@@ -134,20 +205,24 @@ class SimpleIDE(FramelessMainWindow):
         self.detector_thread = DetectorThread(self.detector)
         self.detector_thread.keyword_detected.connect(self.on_keyword_detected)
         self.detector_thread.silence_detected.connect(self.on_silence_detected)
+        self.detector_thread.partial_transcription.connect(self.on_partial_transcription)
         self.detector_thread.transcription_ready.connect(self.on_transcription_ready)
+        self.detector_thread.transcription_failed.connect(self.on_transcription_failed)
+        self.detector_thread.command_recognized.connect(self.on_command_recognized)
+        self.detector_thread.detector_failed.connect(self.on_detector_failed)
         self.detector_thread.start()
         self.stopped = False
         self.voice_assistant_dock.start_button.setEnabled(False)
         self.voice_assistant_dock.stop_button.setEnabled(True)
-        self.voice_assistant_dock.status_label.setText("Assistant active - Waiting for 'Alexa'...")
+        if self.detector.models_ready.is_set():
+            self.voice_assistant_dock.status_label.setText(self.voice_assistant_dock.waiting_text())
+        else:
+            self.voice_assistant_dock.status_label.setText("Loading voice models...")
         #self.ai_button.start_animation()
 
     def stop_detector(self):
         if self.detector_thread:
-            self.detector_thread.stopped = True
-            self.detector.running = False
-            self.detector.keyword_detected.set()
-            self.detector.silence_detected.set()
+            self.detector_thread.stop()
             self.detector_thread.wait()
 
             if self.detector_thread.isRunning():
@@ -160,25 +235,43 @@ class SimpleIDE(FramelessMainWindow):
         self.voice_assistant_dock.stop_button.setEnabled(False)
         self.voice_assistant_dock.status_label.setText("Assistant stopped")
         #self.ai_button.stop_animation()
-    def on_keyword_detected(self):
-        self.voice_assistant_dock.status_label.setText("Alexa detected! Listening...")
+    def on_detector_failed(self, message):
+        print(f"Voice assistant failed to start: {message}")
+        self.stop_detector()
+        self.voice_assistant_dock.status_label.setText(f"Assistant failed to start: {message}")
+
+    def on_keyword_detected(self, keyword):
+        self.voice_assistant_dock.on_keyword_detected(keyword)
         #self.ai_button.set_active_state(True)
 
     def on_silence_detected(self):
-        self.voice_assistant_dock.status_label.setText("Processing audio...")
+        pending = self.detector.transcription_pool.metrics()["outstanding"]
+        if pending > 1:
+            self.voice_assistant_dock.status_label.setText(f"Processing audio... ({pending} queued)")
+        else:
+            self.voice_assistant_dock.status_label.setText("Processing audio...")
         #self.ai_button.set_processing_state(True)
 
-    def on_transcription_ready(self, transcription):
-        current_text = self.voice_assistant_dock.transcription_text.toPlainText()
-        if current_text:
-            new_text = f"{current_text}\n{transcription}"
-        else:
-            new_text = transcription
-        self.voice_assistant_dock.transcription_text.setPlainText(new_text)
-        self.voice_assistant_dock.status_label.setText("Assistant active - Waiting for 'Alexa'...")
+    def on_partial_transcription(self, partial):
+        self.voice_assistant_dock.on_partial_transcription(partial)
+
+    def on_transcription_ready(self, job_id, transcription):
+        self.voice_assistant_dock.on_transcription_ready(transcription)
         #self.ai_button.set_active_state(False)
         #self.ai_button.set_processing_state(False)
 
+    def on_command_recognized(self, job_id, match):
+        self.voice_assistant_dock.on_command_recognized(match)
+        try:
+            match.execute()
+        except Exception as e:
+            print(f"Voice command '{match.command.name}' failed: {e}")
+            self.voice_assistant_dock.status_label.setText(f"Command failed: {e}")
+
+    def on_transcription_failed(self, job_id, message):
+        print(f"Transcription {job_id} failed: {message}")
+        self.voice_assistant_dock.status_label.setText(f"Transcription failed: {message}")
+
     def create_new_file(self):
         self.file_explorer.create_new_file()
 
@@ -204,6 +297,7 @@ class SimpleIDE(FramelessMainWindow):
         self.tabs.remove_tab(self.tabs.get_tab_by_index(index + 1))
     def closeEvent(self, event):
         self.stop_detector()
+        self.detector.close()
         event.accept()
 
     def apply_styles(self):
@@ -4,6 +4,8 @@ from PyQt5.QtWidgets import QMenuBar, QWidget, QMenu, QAction, QLabel
 from PyQt5.QtGui import QIcon, QPixmap
 from qframelesswindow import StandardTitleBar
 
+EDITOR_STYLES = ["monokai", "default", "friendly", "fruity", "manni", "paraiso-dark", "solarized-dark"]
+
 class CustomTitleBar(StandardTitleBar):
     def __init__(self, parent=None, ide_instance=None):
         super().__init__(parent)
@@ -25,6 +27,7 @@ class CustomTitleBar(StandardTitleBar):
         
         # Create and setup menubar
         self.menuBar = QMenuBar(self.ide_instance.titleBar)
+        self.ide_menu_bar = self.menuBar  # the menus below; voice commands are built from it
         
         file_menu = self.menuBar.addMenu("File")
         new_file_action = file_menu.addAction("New File")
@@ -46,8 +49,7 @@ class CustomTitleBar(StandardTitleBar):
         view_menu = self.menuBar.addMenu("View")
         editor_template_menu = view_menu.addMenu("Editor Template")
 
-        styles = ["monokai", "default", "friendly", "fruity", "manni", "paraiso-dark", "solarized-dark"]
-        for style_name in styles:
+        for style_name in EDITOR_STYLES:
             style_action = QAction(style_name, self)
             style_action.triggered.connect(lambda checked, s=style_name: self.ide_instance.change_style(s))
             editor_template_menu.addAction(style_action)
@@ -1,12 +1,12 @@
 import math
-import pyaudio
 import numpy as np
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QPainter, QLinearGradient, QColor, QPainterPath
 from PyQt5.QtWidgets import QWidget
+from audio_hub import get_shared_hub
 
 class AnimatedWaveBackground(QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, hub=None):
         super().__init__(parent)
         
         self.setAttribute(Qt.WA_TransparentForMouseEvents)
@@ -26,12 +26,13 @@ class AnimatedWaveBackground(QWidget):
         self.timer.timeout.connect(self.update_wave)
         self.timer.start(16)  # ~60 FPS
 
-        self.p = pyaudio.PyAudio()
-        self.stream = self.p.open(format=pyaudio.paFloat32, channels=1, rate=44100, input=True, frames_per_buffer=1024)
+        # Reads the microphone through the shared hub (or the voice engine's, see
+        # set_audio_hub) only while visible, and never blocks
+        self.hub = hub or get_shared_hub()
+        self.subscription = None
 
         self.audio_timer = QTimer(self)
         self.audio_timer.timeout.connect(self.capture_audio)
-        self.audio_timer.start(20)
         
         self.audio_data = np.zeros(1024, dtype=np.float32)
         self.frequency_amplitudes = [0] * self.num_waves
@@ -94,9 +95,38 @@ class AnimatedWaveBackground(QWidget):
 
         self.update()
 
+    def set_audio_hub(self, hub):
+        """Read from another hub, e.g. the voice engine process's RemoteAudioHub."""
+        subscribed = self.subscription is not None
+        self.release_audio()
+        self.hub = hub
+        if subscribed:
+            self.subscription = self.hub.subscribe(dtype=np.float32, buffer_s=0.5)
+            self.audio_timer.start(20)
+
+    def showEvent(self, event):
+        if self.subscription is None:
+            self.subscription = self.hub.subscribe(dtype=np.float32, buffer_s=0.5)
+        self.audio_timer.start(20)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.release_audio()
+        super().hideEvent(event)
+
+    def release_audio(self):
+        self.audio_timer.stop()
+        if self.subscription is not None:
+            self.subscription.close()
+            self.subscription = None
+
     def capture_audio(self):
-        data = self.stream.read(1024, exception_on_overflow=False)
-        self.audio_data = np.frombuffer(data, dtype=np.float32)
+        if self.subscription is None:
+            return
+        samples = self.subscription.latest(1024)
+        if len(samples) < 1024:
+            return
+        self.audio_data = samples
 
         volume = np.abs(self.audio_data).mean()
         
@@ -109,7 +139,7 @@ class AnimatedWaveBackground(QWidget):
         self.target_amplitude = max((smoothed_volume - noise_threshold) * 3, 0)
 
         fft_data = np.fft.fft(self.audio_data)
-        freqs = np.fft.fftfreq(len(fft_data), 1.0 / 44100)
+        freqs = np.fft.fftfreq(len(fft_data), 1.0 / self.subscription.rate)
         
         freq_bands = np.array_split(np.abs(freqs), self.num_waves)
         for i, band in enumerate(freq_bands):
@@ -118,8 +148,6 @@ class AnimatedWaveBackground(QWidget):
             self.frequency_amplitudes[i] += 0.1 * (target_amplitude - self.frequency_amplitudes[i])
 
     def closeEvent(self, event):
-        self.stream.stop_stream()
-        self.stream.close()
-        self.p.terminate()
+        self.release_audio()
         super().closeEvent(event)
 
@@ -0,0 +1,206 @@
+"""Calibrate the audio pipeline's chunk and buffer sizes on this machine.
+
+For each candidate chunk size the per-chunk work of the idle detector
+(levels, noise profile, VAD, wake word) is timed, then the microphone is
+opened in callback mode for a few seconds per (chunk, PortAudio buffer)
+combination while a consumer thread does that work, counting input
+overflows/underflows and how far the consumer falls behind. The fastest
+configuration that drops nothing is saved under "audio" in the project's
+project.aide.json, where SimpleIDE picks it up.
+
+Usage: python audio_autotune.py PROJECT_DIR [--seconds 3] [--device N]
+"""
+import time
+import queue
+import argparse
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from audio_features import resample
+from projects import ProjectManager
+
+RATE = 16000  # openWakeWord and Whisper both want 16 kHz
+CHUNK_SIZES = (1280, 2560, 3840)  # multiples of openWakeWord's 80 ms frame
+BUFFER_DIVISORS = (1, 2, 4)  # PortAudio buffers per chunk
+DEFAULT_SETTINGS = {"chunk_size": 1280, "capture_rate": RATE, "frames_per_buffer": 1280}
+
+
+def load_audio_settings(project_path):
+    """CombinedDetector keyword arguments saved by a previous calibration, or {}."""
+    if not project_path:
+        return {}
+    audio = ProjectManager(None, None).read_project_json(project_path).get("audio") or {}
+    return {key: audio[key] for key in DEFAULT_SETTINGS if key in audio}
+
+
+def save_audio_settings(project_path, settings):
+    ProjectManager(None, None).update_project_json(project_path, {"audio": settings})
+
+
+def native_capture_rate(device_index=None):
+    """16 kHz if the input device supports it, otherwise its default rate (resampled by the hub)."""
+    import pyaudio
+    audio = pyaudio.PyAudio()
+    try:
+        try:
+            if audio.is_format_supported(RATE, input_device=device_index, input_channels=1,
+                                         input_format=pyaudio.paInt16):
+                return RATE
+        except ValueError:
+            pass
+        if device_index is None:
+            info = audio.get_default_input_device_info()
+        else:
+            info = audio.get_device_info_by_index(device_index)
+        return int(info["defaultSampleRate"])
+    finally:
+        audio.terminate()
+
+
+def idle_chunk_work(detector, capture_rate):
+    """What the capture and detector threads do with each chunk while waiting for the wake word."""
+    def work(chunk):
+        chunk = resample(chunk, capture_rate, detector.rate)
+        detector.last_chunk_db = detector.get_db(chunk)
+        detector.suppress_noise(chunk)
+        detector.vad.observe_idle(chunk, detector.last_chunk_db)
+        detector.detect_keyword(chunk)
+    return work
+
+
+def measure_inference(work, chunk_size, seconds=5.0, rate=RATE):
+    """Per-chunk processing time on quiet background noise, in milliseconds."""
+    rng = np.random.default_rng(0)
+    n_chunks = max(10, int(seconds * rate / chunk_size))
+    timings = []
+    for _ in range(n_chunks):
+        chunk = (rng.standard_normal(chunk_size) * 200).astype(np.int16)  # about -44 dBFS
+        start = time.perf_counter()
+        work(chunk)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings = np.array(timings[2:])  # first calls warm caches
+    return {"p50_ms": float(np.percentile(timings, 50)), "p95_ms": float(np.percentile(timings, 95))}
+
+
+def measure_stream(work, capture_rate, chunk_size, frames_per_buffer, seconds=3.0, device_index=None):
+    """Run the microphone in callback mode while ``work`` consumes chunks of ``chunk_size``."""
+    import pyaudio
+    flags = {"overflows": 0, "underflows": 0}
+    buffers = queue.Queue()
+
+    def callback(data, frame_count, time_info, status):
+        if status & pyaudio.paInputOverflow:
+            flags["overflows"] += 1
+        if status & pyaudio.paInputUnderflow:
+            flags["underflows"] += 1
+        buffers.put(data)
+        return None, pyaudio.paContinue
+
+    audio = pyaudio.PyAudio()
+    stream = audio.open(format=pyaudio.paInt16, channels=1, rate=capture_rate, input=True,
+                        input_device_index=device_index, frames_per_buffer=frames_per_buffer,
+                        stream_callback=callback)
+    stop = threading.Event()
+    backlog = {"max_chunks": 0.0}
+
+    def consume():
+        pending = np.zeros(0, dtype=np.int16)
+        while not stop.is_set():
+            try:
+                data = buffers.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            pending = np.concatenate([pending, np.frombuffer(data, dtype=np.int16)])
+            while len(pending) >= chunk_size:
+                work(pending[:chunk_size])
+                pending = pending[chunk_size:]
+                waiting = buffers.qsize() * frames_per_buffer + len(pending)
+                backlog["max_chunks"] = max(backlog["max_chunks"], waiting / chunk_size)
+
+    consumer = threading.Thread(target=consume, daemon=True)
+    try:
+        stream.start_stream()
+        consumer.start()
+        time.sleep(seconds)
+        input_latency_ms = stream.get_input_latency() * 1000
+    finally:
+        stop.set()
+        stream.stop_stream()
+        stream.close()
+        audio.terminate()
+        consumer.join()
+    return dict(flags, input_latency_ms=input_latency_ms, max_backlog_chunks=backlog["max_chunks"])
+
+
+def choose_settings(results, max_load=0.5):
+    """Lowest-latency configuration without drops, whose p95 work uses at most ``max_load`` of a chunk.
+
+    Leaves CPU headroom for transcription, which runs at the same time.
+    """
+    best = None
+    for result in results:
+        chunk_ms = 1000 * result["chunk_size"] / RATE
+        if (result["overflows"] or result["underflows"] or result["max_backlog_chunks"] > 1.0
+                or result["p95_ms"] > max_load * chunk_ms):
+            continue
+        # A sample waits for its chunk to fill, the device buffer, and the processing
+        latency_ms = chunk_ms + result["input_latency_ms"] + result["p50_ms"]
+        if best is None or latency_ms < best[0]:
+            best = (latency_ms, result)
+    if best is None:
+        return None
+    latency_ms, result = best
+    return {"chunk_size": result["chunk_size"], "capture_rate": result["capture_rate"],
+            "frames_per_buffer": result["frames_per_buffer"], "latency_ms": round(latency_ms, 1)}
+
+
+def calibrate(project_path=None, seconds=3.0, device_index=None, **detector_kwargs):
+    """Measure every candidate configuration; saves and returns the chosen settings."""
+    from voice_detection_module import CombinedDetector
+
+    capture_rate = native_capture_rate(device_index)
+    detector = CombinedDetector(rate=RATE, transcription_cache=False, streaming=False, **detector_kwargs)
+    detector.load_models()
+    work = idle_chunk_work(detector, capture_rate)
+    results = []
+    try:
+        for chunk_size in CHUNK_SIZES:
+            timing = measure_inference(work, chunk_size * capture_rate // RATE)
+            print(f"chunk {chunk_size}: p50 {timing['p50_ms']:.1f} ms, p95 {timing['p95_ms']:.1f} ms "
+                  f"of {1000 * chunk_size / RATE:.0f} ms")
+            for divisor in BUFFER_DIVISORS:
+                capture_chunk = chunk_size * capture_rate // RATE
+                frames_per_buffer = capture_chunk // divisor
+                try:
+                    stream = measure_stream(work, capture_rate, capture_chunk, frames_per_buffer,
+                                            seconds, device_index)
+                except Exception as e:
+                    print(f"  buffer {frames_per_buffer}: could not open the input ({e})")
+                    continue
+                print(f"  buffer {frames_per_buffer}: {stream['overflows']} overflows, "
+                      f"{stream['underflows']} underflows, backlog {stream['max_backlog_chunks']:.1f} chunks, "
+                      f"input latency {stream['input_latency_ms']:.1f} ms")
+                results.append(dict(timing, **stream, chunk_size=chunk_size, capture_rate=capture_rate,
+                                    frames_per_buffer=frames_per_buffer))
+    finally:
+        detector.close()
+
+    settings = choose_settings(results)
+    if settings is None:
+        print("No configuration ran without dropping audio; keeping the defaults")
+        settings = dict(DEFAULT_SETTINGS)
+    settings["calibrated_at"] = datetime.now().isoformat(timespec="seconds")
+    if project_path:
+        save_audio_settings(project_path, settings)
+    return settings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("project", nargs="?", help="project directory to save the settings to")
+    parser.add_argument("--seconds", type=float, default=3.0, help="microphone time per configuration")
+    parser.add_argument("--device", type=int, default=None, help="PyAudio input device index")
+    args = parser.parse_args()
+    print(calibrate(args.project, args.seconds, args.device))
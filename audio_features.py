@@ -0,0 +1,49 @@
+import numpy as np
+
+
+def to_float(audio):
+    """int16 PCM to float32 in [-1.0, 1.0]; float input is returned unchanged."""
+    if audio.dtype == np.int16:
+        return audio.astype(np.float32) / 32768.0
+    return audio
+
+
+def rms_db(audio):
+    """RMS level of the whole signal in dBFS."""
+    audio = to_float(audio)
+    return 20 * np.log10(np.sqrt(np.mean(np.square(audio))) + 1e-10)
+
+
+def frame_db(audio, frame_samples):
+    """RMS level in dBFS of each consecutive, non-overlapping frame.
+
+    Computed in one pass with a reshape, so the whole envelope costs about the
+    same as a single get_db call on the full signal. A trailing partial frame
+    is ignored.
+    """
+    audio = to_float(audio)
+    n_frames = len(audio) // frame_samples
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[:n_frames * frame_samples].reshape(n_frames, frame_samples)
+    return 20 * np.log10(np.sqrt(np.mean(np.square(frames), axis=1)) + 1e-10)
+
+
+def speech_bounds(levels, threshold_db):
+    """Indices of the first and last frame above ``threshold_db``, or None if all are silent."""
+    voiced = np.flatnonzero(levels > threshold_db)
+    if len(voiced) == 0:
+        return None
+    return int(voiced[0]), int(voiced[-1])
+
+
+def resample(audio, src_rate, dst_rate):
+    """Linear-interpolation resampling; cheap enough for metering and fixtures."""
+    if src_rate == dst_rate or len(audio) == 0:
+        return audio
+    n_out = int(round(len(audio) * dst_rate / src_rate))
+    positions = np.arange(n_out) * (src_rate / dst_rate)
+    resampled = np.interp(positions, np.arange(len(audio)), audio.astype(np.float32))
+    if audio.dtype == np.int16:
+        return np.clip(np.round(resampled), -32768, 32767).astype(np.int16)
+    return resampled.astype(audio.dtype)
@@ -0,0 +1,190 @@
+import threading
+import numpy as np
+from audio_ring_buffer import AudioRingBuffer
+from audio_features import resample
+from audio_sources import MicrophoneSource
+
+
+class AudioSubscription:
+    """One consumer of the hub: its own ring buffer and read cursor.
+
+    ``read`` blocks for the next samples (wake word, VAD, recorder);
+    ``latest`` never blocks and returns the newest samples (visualizers).
+    A reader that falls more than ``buffer_s`` behind skips ahead and the
+    lost samples are counted in ``overruns``.
+    """
+
+    def __init__(self, hub, rate, dtype, buffer_s):
+        self.hub = hub
+        self.rate = rate
+        self.dtype = np.dtype(dtype)
+        self.ring = AudioRingBuffer(max(1, int(buffer_s * rate)), dtype=self.dtype)
+        self.cond = threading.Condition()
+        self.read_pos = 0
+        self.overruns = 0
+        self.closed = False
+
+    def _push(self, samples):
+        with self.cond:
+            self.ring.write(samples)
+            self.cond.notify_all()
+
+    def read(self, n, timeout=None):
+        """Return the next ``n`` samples, or None once the subscription or hub is closed and drained."""
+        with self.cond:
+            ready = self.cond.wait_for(
+                lambda: self.closed or self.ring.total_written - self.read_pos >= n, timeout=timeout)
+            if not ready or self.ring.total_written - self.read_pos < n:
+                # Closed: samples already buffered are still handed out first
+                return None
+            if self.read_pos < self.ring.oldest:
+                self.overruns += self.ring.oldest - self.read_pos
+                self.read_pos = self.ring.oldest
+            chunk = np.array(self.ring.view(self.read_pos, self.read_pos + n))
+            self.read_pos += n
+            return chunk
+
+    def latest(self, n):
+        """Copy of the newest ``n`` samples (fewer right after subscribing)."""
+        with self.cond:
+            return np.array(self.ring.latest(n))
+
+    def _close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+def fan_out(chunk, rate, subscribers):
+    """Push an int16 chunk to each subscription, converted once per distinct rate and dtype."""
+    converted = {}
+    for subscription in subscribers:
+        key = (subscription.rate, subscription.dtype)
+        if key not in converted:
+            samples = resample(chunk, rate, subscription.rate)
+            if subscription.dtype != np.int16:
+                samples = (samples.astype(np.float32) / 32768.0).astype(subscription.dtype)
+            converted[key] = samples
+        subscription._push(converted[key])
+
+
+class AudioCaptureHub:
+    """Reads the input device once, on its own thread, and fans chunks out.
+
+    Subscribers each get a ring buffer in the sample rate and dtype they
+    asked for; conversion happens once per chunk for each distinct format,
+    not once per subscriber. The device is opened with the first subscriber
+    and released with the last one. ``source`` replaces the microphone with
+    any AudioSource, e.g. a realtime ReplaySource for headless runs.
+    """
+
+    def __init__(self, rate=16000, chunk_size=1280, device_index=None, source=None):
+        self.rate = rate
+        self.chunk_size = chunk_size
+        self.device_index = device_index
+        self.source = source or MicrophoneSource(rate, chunk_size, device_index)
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+        self._stop_event = None  # per capture thread, so a restart can't revive an old one
+        self.error = None
+        self.chunks_read = 0
+
+    def configure(self, rate=None, chunk_size=None, frames_per_buffer=None, device_index=None):
+        """Change the microphone capture format; takes effect the next time the device is opened."""
+        with self.lock:
+            if not isinstance(self.source, MicrophoneSource):
+                print("Capture settings only apply to the microphone, ignoring them")
+                return
+            self.rate = rate or self.rate
+            self.chunk_size = chunk_size or self.chunk_size
+            self.device_index = device_index if device_index is not None else self.device_index
+            self.source = MicrophoneSource(self.rate, self.chunk_size, self.device_index,
+                                           frames_per_buffer or self.source.frames_per_buffer)
+
+    def subscribe(self, rate=None, dtype=np.int16, buffer_s=5.0):
+        """Register a consumer and start capturing if it is the first one."""
+        subscription = AudioSubscription(self, rate or self.rate, dtype, buffer_s)
+        with self.lock:
+            self.subscribers.append(subscription)
+            if not self.running:
+                self.running = True
+                self.error = None
+                self._stop_event = threading.Event()
+                self.thread = threading.Thread(target=self._run, args=(self._stop_event, self.thread),
+                                               daemon=True)
+                self.thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            if subscription in self.subscribers:
+                self.subscribers.remove(subscription)
+            if self.running and not self.subscribers:
+                self.running = False
+                self._stop_event.set()
+        subscription._close()
+
+    def _run(self, stop_event, previous_thread):
+        if previous_thread is not None:
+            # Let a capture thread that is still winding down release the device first
+            previous_thread.join()
+        # configure() may swap these for the next session while this one runs
+        with self.lock:
+            source, rate, chunk_size = self.source, self.rate, self.chunk_size
+        try:
+            source.open()
+        except Exception as e:
+            self._fail(stop_event, f"Could not open audio input: {e}")
+            return
+        try:
+            while not stop_event.is_set():
+                chunk = source.read(chunk_size)
+                if chunk is None:
+                    # End of a replayed recording: subscribers see a closed stream
+                    self._fail(stop_event, None)
+                    break
+                self._dispatch(chunk, stop_event, rate)
+        except Exception as e:
+            self._fail(stop_event, f"Audio capture failed: {e}")
+        finally:
+            source.close()
+
+    def _dispatch(self, chunk, stop_event, rate):
+        with self.lock:
+            if stop_event.is_set():
+                # A stopped thread must not feed subscribers of the next capture session
+                return
+            subscribers = list(self.subscribers)
+        self.chunks_read += 1
+        fan_out(chunk, rate, subscribers)
+
+    def _fail(self, stop_event, message):
+        if message:
+            print(message)
+        stop_event.set()
+        with self.lock:
+            if self._stop_event is not stop_event:
+                return
+            self.error = message
+            self.running = False
+            subscribers, self.subscribers = self.subscribers, []
+        for subscription in subscribers:
+            subscription._close()
+
+
+_shared_hub = None
+_shared_hub_lock = threading.Lock()
+
+
+def get_shared_hub():
+    """The process-wide hub used by the detector and the wave visualizer."""
+    global _shared_hub
+    with _shared_hub_lock:
+        if _shared_hub is None:
+            _shared_hub = AudioCaptureHub()
+        return _shared_hub
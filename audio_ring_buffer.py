@@ -0,0 +1,70 @@
+import numpy as np
+
+
+class AudioRingBuffer:
+    """Fixed-capacity audio ring buffer addressed by absolute sample index.
+
+    Every sample is stored twice (at ``i`` and ``i + capacity``), so any span
+    of up to ``capacity`` samples is one contiguous slice and readers get
+    zero-copy views. Views alias the storage: copy them if they must survive
+    more than ``capacity`` further samples of writes. Single writer only.
+    """
+
+    def __init__(self, capacity, dtype=np.int16):
+        self.capacity = int(capacity)
+        if self.capacity <= 0:
+            raise ValueError("Ring buffer capacity must be positive")
+        self.dtype = np.dtype(dtype)
+        self._data = np.zeros(2 * self.capacity, dtype=self.dtype)
+        self.total_written = 0
+
+    def __len__(self):
+        """Number of samples currently readable."""
+        return min(self.total_written, self.capacity)
+
+    @property
+    def oldest(self):
+        """Absolute index of the oldest sample still held in the buffer."""
+        return max(0, self.total_written - self.capacity)
+
+    def write(self, samples):
+        """Append samples, overwriting the oldest ones once the buffer is full."""
+        samples = np.asarray(samples, dtype=self.dtype).ravel()
+        n = len(samples)
+        if n == 0:
+            return
+        if n > self.capacity:
+            # Only the newest `capacity` samples can survive the write anyway
+            self.total_written += n - self.capacity
+            samples = samples[-self.capacity:]
+            n = self.capacity
+
+        start = self.total_written % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[self.capacity + start:self.capacity + start + first] = samples[:first]
+        rest = n - first
+        if rest:
+            self._data[:rest] = samples[first:]
+            self._data[self.capacity:self.capacity + rest] = samples[first:]
+        self.total_written += n
+
+    def view(self, start, end=None):
+        """Return a zero-copy view of samples in the absolute range [start, end)."""
+        if end is None:
+            end = self.total_written
+        if start < self.oldest or end > self.total_written or start > end:
+            raise IndexError(
+                f"Range [{start}, {end}) outside buffered samples "
+                f"[{self.oldest}, {self.total_written})")
+        offset = start % self.capacity
+        return self._data[offset:offset + (end - start)]
+
+    def latest(self, n):
+        """Return a zero-copy view of the newest ``n`` samples (or fewer if not yet written)."""
+        n = min(int(n), len(self))
+        return self.view(self.total_written - n)
+
+    def reset(self):
+        """Forget all buffered samples."""
+        self.total_written = 0
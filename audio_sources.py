@@ -0,0 +1,141 @@
+import time
+import wave
+import numpy as np
+from audio_features import resample
+
+
+def load_wav(path, rate=16000):
+    """Read a PCM WAV file as mono int16 at ``rate``."""
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV files are supported")
+        channels = wav.getnchannels()
+        src_rate = wav.getframerate()
+        audio = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return resample(audio, src_rate, rate)
+
+
+class AudioSource:
+    """Mono int16 input read chunk by chunk by the capture hub or the detector.
+
+    ``read`` returns exactly ``n`` samples, or None once the source is
+    exhausted. ``realtime`` sources deliver audio at the speed it was
+    recorded; the others return as fast as they are read, so consumers
+    should apply backpressure instead of dropping work.
+    """
+
+    realtime = True
+
+    def __init__(self, rate=16000, chunk_size=1280):
+        self.rate = rate
+        self.chunk_size = chunk_size
+
+    def open(self):
+        pass
+
+    def read(self, n):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MicrophoneSource(AudioSource):
+    """The default PyAudio input device (or ``device_index``).
+
+    ``frames_per_buffer`` is PortAudio's buffer size (``chunk_size`` by
+    default); smaller buffers lower the input latency at the cost of more
+    wakeups.
+    """
+
+    def __init__(self, rate=16000, chunk_size=1280, device_index=None, frames_per_buffer=None):
+        super().__init__(rate, chunk_size)
+        self.device_index = device_index
+        self.frames_per_buffer = frames_per_buffer or chunk_size
+        self.audio = None
+        self.stream = None
+
+    def open(self):
+        import pyaudio
+        self.audio = pyaudio.PyAudio()
+        self.stream = self.audio.open(format=pyaudio.paInt16,
+                                      channels=1,
+                                      rate=self.rate,
+                                      input=True,
+                                      input_device_index=self.device_index,
+                                      frames_per_buffer=self.frames_per_buffer)
+
+    def read(self, n):
+        return np.frombuffer(self.stream.read(n, exception_on_overflow=False), dtype=np.int16)
+
+    def close(self):
+        if self.stream is None:
+            return
+        try:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.audio.terminate()
+        except Exception as e:
+            print(f"Error closing microphone stream: {e}")
+        self.stream = None
+        self.audio = None
+
+
+class ReplaySource(AudioSource):
+    """Plays back a WAV file or a NumPy array as if it came from the microphone.
+
+    Args:
+        audio: path to a 16-bit PCM WAV file, or an int16/float array at ``rate``.
+        realtime: pace reads to the recording's duration; otherwise return
+            chunks as fast as they are requested (offline runs, benchmarks).
+        loop: start over at the end instead of reporting end of input.
+        tail_silence_s: digital silence appended after the recording, so the
+            silence detector can close an utterance that runs to the end.
+    """
+
+    def __init__(self, audio, rate=16000, chunk_size=1280, realtime=False, loop=False, tail_silence_s=0.0):
+        super().__init__(rate, chunk_size)
+        if isinstance(audio, str):
+            self.path = audio
+            audio = load_wav(audio, rate)
+        else:
+            self.path = None
+            audio = np.asarray(audio)
+            if audio.dtype != np.int16:
+                audio = np.clip(np.round(audio * 32768.0), -32768, 32767).astype(np.int16)
+        if tail_silence_s > 0:
+            audio = np.concatenate([audio, np.zeros(int(tail_silence_s * rate), dtype=np.int16)])
+        self.samples = audio
+        self.realtime = realtime
+        self.loop = loop
+        self.position = 0
+        self.samples_read = 0
+        self.started = None
+
+    @property
+    def duration_s(self):
+        return len(self.samples) / self.rate
+
+    def open(self):
+        self.position = 0
+        self.samples_read = 0
+        self.started = time.perf_counter()
+
+    def read(self, n):
+        if self.position >= len(self.samples):
+            if not self.loop or len(self.samples) == 0:
+                return None
+            self.position = 0
+        chunk = self.samples[self.position:self.position + n]
+        if len(chunk) < n:
+            # Pad the last partial chunk so every read has the size the caller asked for
+            chunk = np.concatenate([chunk, np.zeros(n - len(chunk), dtype=np.int16)])
+        self.position += n
+        self.samples_read += n
+        if self.realtime:
+            delay = self.started + self.samples_read / self.rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return chunk
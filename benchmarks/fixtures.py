@@ -0,0 +1,99 @@
+"""Recorded WAV fixtures shared by the voice pipeline benchmarks.
+
+Fixtures live in a directory (``benchmarks/fixtures`` by default) next to a
+``manifest.json`` describing each recording::
+
+    [
+        {
+            "file": "open_main.wav",
+            "keyword": "alexa",          # wake word spoken, if any
+            "keyword_end_s": 1.05,       # when the wake word finishes
+            "speech_end_s": 3.40,        # when the user stops talking
+            "transcript": "apri il file main"
+        }
+    ]
+
+Every field but ``file`` is optional; benchmarks skip fixtures that lack the
+labels they need. Recordings should end with at least two seconds of room
+noise so endpointing can complete.
+"""
+import os
+import sys
+import json
+import re
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from audio_sources import load_wav
+
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixtures(fixtures_dir=DEFAULT_FIXTURES_DIR, rate=16000, require=()):
+    """Load the manifest entries that have every label in ``require``, with their audio."""
+    manifest_path = os.path.join(fixtures_dir, "manifest.json")
+    if not os.path.isfile(manifest_path):
+        raise FileNotFoundError(f"No fixture manifest at {manifest_path} (see benchmarks/fixtures.py)")
+    with open(manifest_path) as f:
+        entries = json.load(f)
+
+    fixtures = []
+    for entry in entries:
+        if any(entry.get(label) is None for label in require):
+            continue
+        fixture = dict(entry)
+        fixture["path"] = os.path.join(fixtures_dir, entry["file"])
+        fixture["audio"] = load_wav(fixture["path"], rate)
+        fixtures.append(fixture)
+    return fixtures
+
+
+def chunks(audio, chunk_size):
+    """Yield consecutive full chunks of ``audio``."""
+    for start in range(0, len(audio) - chunk_size + 1, chunk_size):
+        yield audio[start:start + chunk_size]
+
+
+def summarize(values):
+    """Mean / median / p90 / max of a list of numbers, or None when empty."""
+    if not values:
+        return None
+    values = np.asarray(values, dtype=np.float64)
+    return {
+        "count": int(len(values)),
+        "mean": float(values.mean()),
+        "median": float(np.median(values)),
+        "p90": float(np.percentile(values, 90)),
+        "max": float(values.max()),
+    }
+
+
+def normalize_words(text):
+    """Lowercase words without punctuation, for comparing transcripts."""
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level edit distance divided by the number of reference words."""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    if not ref:
+        return float(bool(hyp))
+    distances = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        previous, distances[0] = distances[0], i
+        for j, hyp_word in enumerate(hyp, 1):
+            previous, distances[j] = distances[j], min(distances[j] + 1, distances[j - 1] + 1,
+                                                       previous + (ref_word != hyp_word))
+    return distances[-1] / len(ref)
+
+
+def write_json(results, path=None):
+    """Print results as JSON, and also write them to ``path`` if given."""
+    text = json.dumps(results, indent=4)
+    if path:
+        with open(path, "w") as f:
+            f.write(text)
+    print(text)
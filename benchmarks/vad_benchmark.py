@@ -0,0 +1,86 @@
+"""Compare VAD backends on endpointing latency and accuracy.
+
+Replays each fixture chunk by chunk through the same end-of-utterance rule
+CombinedDetector uses (``silence_duration`` seconds of non-speech chunks
+after the wake word) and reports, per backend:
+
+- latency: endpoint time minus the labelled ``speech_end_s``
+- clipped: endpoints that fired before the user finished speaking
+- missed: recordings where no endpoint fired at all
+- CPU time per chunk
+
+Usage: python benchmarks/vad_benchmark.py [--fixtures DIR] [--vad rms adaptive onnx] [--output results.json]
+"""
+import argparse
+import time
+
+from fixtures import DEFAULT_FIXTURES_DIR, load_fixtures, chunks, summarize, write_json
+from audio_features import rms_db
+from vad import create_vad
+
+
+def endpoint(vad, audio, keyword_end_s, rate, chunk_size, silence_duration):
+    """Time in seconds at which the detector would end the utterance, or None."""
+    limit = silence_duration * rate / chunk_size
+    silent_chunks = 0
+    cpu_s = 0.0
+    n_chunks = 0
+    for index, chunk in enumerate(chunks(audio, chunk_size)):
+        chunk_end_s = (index + 1) * chunk_size / rate
+        level = rms_db(chunk)
+        started = time.perf_counter()
+        if chunk_end_s <= keyword_end_s:
+            vad.observe_idle(chunk, level)
+        else:
+            if not vad.is_speech(chunk, level):
+                silent_chunks += 1
+            else:
+                silent_chunks = 0
+        cpu_s += time.perf_counter() - started
+        n_chunks += 1
+        if silent_chunks > limit:
+            return chunk_end_s, cpu_s / n_chunks
+    return None, cpu_s / max(n_chunks, 1)
+
+
+def run(fixtures_dir, backends, rate=16000, chunk_size=1280, silence_duration=1.2, threshold_db=-50):
+    fixtures = load_fixtures(fixtures_dir, rate, require=("speech_end_s",))
+    results = {"rate": rate, "chunk_size": chunk_size, "silence_duration": silence_duration,
+               "fixtures": len(fixtures), "backends": {}}
+    for name in backends:
+        latencies, cpu_per_chunk, per_fixture = [], [], []
+        clipped = missed = 0
+        for fixture in fixtures:
+            vad = create_vad(name, threshold_db=threshold_db)
+            vad.load()
+            end_s, cpu_s = endpoint(vad, fixture["audio"], fixture.get("keyword_end_s") or 0.0,
+                                    rate, chunk_size, silence_duration)
+            cpu_per_chunk.append(cpu_s)
+            if end_s is None:
+                missed += 1
+                latency = None
+            else:
+                latency = end_s - fixture["speech_end_s"]
+                latencies.append(latency)
+                clipped += latency < 0
+            per_fixture.append({"file": fixture["file"], "endpoint_s": end_s, "latency_s": latency})
+        results["backends"][name] = {
+            "latency_s": summarize(latencies),
+            "clipped": int(clipped),
+            "missed": missed,
+            "cpu_per_chunk_s": summarize(cpu_per_chunk),
+            "per_fixture": per_fixture,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR)
+    parser.add_argument("--vad", nargs="+", default=["rms", "adaptive", "onnx"])
+    parser.add_argument("--silence-duration", type=float, default=1.2)
+    parser.add_argument("--threshold-db", type=float, default=-50)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    write_json(run(args.fixtures, args.vad, silence_duration=args.silence_duration,
+                   threshold_db=args.threshold_db), args.output)
@@ -0,0 +1,185 @@
+"""End-to-end latency of the voice pipeline, stage by stage.
+
+Replays each fixture through a real CombinedDetector (openWakeWord, VAD,
+noise reduction, Whisper) via ReplaySource and reports, per Whisper model:
+
+- wake_word_latency_s: keyword event minus the labelled ``keyword_end_s``
+- endpoint_delay_s: silence event minus the labelled ``speech_end_s``
+- noise_reduction_s: time spent in ``nr.reduce_noise`` per utterance
+- streaming_denoise_s_per_chunk: spectral subtraction cost during capture
+  (``--denoise streaming``, the detector default)
+- decode_s_per_audio_s: Whisper decode time per second of decoded audio
+- transcription_after_endpoint_s: wall time from the silence event to the text
+- time_to_transcription_s: speech end to ``transcription_ready``
+
+Stage positions are measured in audio time, so the default faster-than-
+realtime replay gives the same latencies as a live run; ``--realtime``
+paces the replay like a microphone instead.
+
+Usage: python benchmarks/voice_pipeline_benchmark.py [--fixtures DIR] [--models tiny base small] [--output results.json]
+"""
+import argparse
+import queue
+import time
+
+from fixtures import DEFAULT_FIXTURES_DIR, load_fixtures, summarize, write_json
+from audio_sources import ReplaySource
+from voice_detection_module import CombinedDetector
+
+
+class TimedEvents(queue.Queue):
+    """Detector event queue that stamps each event with wall and audio time."""
+
+    def __init__(self):
+        super().__init__()
+        self.source = None
+
+    def put(self, item, block=True, timeout=None):
+        event, payload = item
+        audio_s = self.source.samples_read / self.source.rate if self.source else None
+        super().put((event, payload, time.perf_counter(), audio_s), block, timeout)
+
+
+class StageTimer:
+    """Wraps a callable and records how long each call took."""
+
+    def __init__(self, func, measure=None):
+        self.func = func
+        self.measure = measure
+        self.calls = []  # (elapsed_s, measure(*args) or None)
+
+    def __call__(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self.func(*args, **kwargs)
+        finally:
+            self.calls.append((time.perf_counter() - started,
+                               self.measure(*args) if self.measure else None))
+
+    def take(self):
+        calls, self.calls = self.calls, []
+        return calls
+
+
+def run_fixture(detector, fixture, rate, chunk_size, realtime, timeout_s):
+    """Replay one fixture and return the stamped events it produced."""
+    source = ReplaySource(fixture["audio"], rate, chunk_size, realtime=realtime, tail_silence_s=2.0)
+    detector.audio_source = source
+    detector.events.source = source
+    detector.start()
+    events, pending = [], set()
+    finished = False
+    deadline = time.perf_counter() + timeout_s
+    try:
+        while not (finished and not pending):
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                print(f"{fixture['file']}: timed out waiting for the pipeline")
+                break
+            try:
+                event, payload, wall_s, audio_s = detector.events.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            events.append((event, payload, wall_s, audio_s))
+            if event == "silence" and payload is not None:
+                pending.add(payload)
+            elif event in ("transcription", "error"):
+                pending.discard(payload[0])
+            elif event in ("end_of_input", "input_error"):
+                finished = True
+    finally:
+        detector.stop()
+        detector.thread.join()
+    return events
+
+
+def measure_fixture(fixture, events):
+    first = {}
+    for event, payload, wall_s, audio_s in events:
+        first.setdefault(event, (payload, wall_s, audio_s))
+    result = {"file": fixture["file"], "keyword_detected": "keyword" in first,
+              "transcription": first["transcription"][0][1] if "transcription" in first else None}
+    if "keyword" in first and fixture.get("keyword_end_s") is not None:
+        result["wake_word_latency_s"] = first["keyword"][2] - fixture["keyword_end_s"]
+    if "silence" in first and fixture.get("speech_end_s") is not None:
+        result["endpoint_delay_s"] = first["silence"][2] - fixture["speech_end_s"]
+    if "silence" in first and "transcription" in first:
+        after = first["transcription"][1] - first["silence"][1]
+        result["transcription_after_endpoint_s"] = after
+        if "endpoint_delay_s" in result:
+            result["time_to_transcription_s"] = result["endpoint_delay_s"] + after
+    return result
+
+
+def run(fixtures_dir, models, rate=16000, chunk_size=1280, vad="rms", denoise="streaming", realtime=False,
+        timeout_s=120.0, cache=False):
+    fixtures = load_fixtures(fixtures_dir, rate)
+    results = {"rate": rate, "chunk_size": chunk_size, "vad": vad, "denoise": denoise, "realtime": realtime,
+               "cache": cache, "fixtures": len(fixtures), "models": {}}
+
+    import noisereduce as nr
+    reduce_noise = nr.reduce_noise
+    for model in models:
+        detector = CombinedDetector(rate=rate, chunk_size=chunk_size, whisper_model_version=model, vad=vad,
+                                    denoise=denoise, transcription_cache=cache)
+        detector.events = TimedEvents()
+        load_started = time.perf_counter()
+        detector.load_models()
+        load_s = time.perf_counter() - load_started
+        decode = StageTimer(detector.whisper_model.transcribe, measure=lambda audio, **kwargs: len(audio) / rate)
+        detector.whisper_model.transcribe = decode
+        nr.reduce_noise = noise_timer = StageTimer(reduce_noise)
+        detector.suppress_noise = streaming_timer = StageTimer(detector.suppress_noise)
+
+        stats = {key: [] for key in ("wake_word_latency_s", "endpoint_delay_s", "transcription_after_endpoint_s",
+                                     "time_to_transcription_s", "noise_reduction_s", "streaming_denoise_s_per_chunk",
+                                     "decode_s_per_audio_s")}
+        per_fixture = []
+        try:
+            for fixture in fixtures:
+                result = measure_fixture(fixture, run_fixture(detector, fixture, rate, chunk_size,
+                                                              realtime, timeout_s))
+                noise_calls = noise_timer.take()
+                streaming_calls = streaming_timer.take()
+                decode_calls = decode.take()
+                result["noise_reduction_s"] = sum(elapsed for elapsed, _ in noise_calls) if noise_calls else None
+                if denoise == "streaming" and streaming_calls:
+                    result["streaming_denoise_s_per_chunk"] = (sum(elapsed for elapsed, _ in streaming_calls) /
+                                                               len(streaming_calls))
+                decoded_s = sum(audio_s for _, audio_s in decode_calls)
+                result["decode_s_per_audio_s"] = (sum(elapsed for elapsed, _ in decode_calls) / decoded_s
+                                                  if decoded_s else None)
+                for key, values in stats.items():
+                    if result.get(key) is not None:
+                        values.append(result[key])
+                per_fixture.append(result)
+        finally:
+            nr.reduce_noise = reduce_noise
+            detector.close()
+
+        results["models"][model] = {
+            "device": detector.device,
+            "load_s": load_s,
+            "keywords_missed": sum(not r["keyword_detected"] for r in per_fixture),
+            "transcription_cache": detector.transcription_cache.stats() if detector.transcription_cache else None,
+            **{key: summarize(values) for key, values in stats.items()},
+            "per_fixture": per_fixture,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR)
+    parser.add_argument("--models", nargs="+", default=["tiny", "base", "small"])
+    parser.add_argument("--vad", default="rms")
+    parser.add_argument("--denoise", default="streaming", choices=["streaming", "nr", "nr_profile", "none"])
+    parser.add_argument("--realtime", action="store_true", help="pace the replay like a live microphone")
+    parser.add_argument("--cache", action="store_true",
+                        help="use the on-disk transcription cache (repeated runs then skip Whisper)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds allowed per fixture")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    write_json(run(args.fixtures, args.models, vad=args.vad,
+                   denoise=None if args.denoise == "none" else args.denoise, realtime=args.realtime,
+                   timeout_s=args.timeout, cache="disk" if args.cache else False), args.output)
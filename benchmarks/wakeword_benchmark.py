@@ -0,0 +1,96 @@
+"""Per-chunk cost and detection results of the wake word models.
+
+Scores every fixture with one openWakeWord Model holding all requested
+wake words, and with the first wake word alone, and reports:
+
+- CPU time per chunk for the single model and for the whole set (the
+  melspectrogram and embedding are shared, so the set should cost little more)
+- the same set in low-power mode (WakeWordGate), with the number of
+  chunks it never scored
+- recall and false fires per configuration, and per fixture which keyword
+  fired first and when, against the labelled ``keyword`` / ``keyword_end_s``
+
+Usage: python benchmarks/wakeword_benchmark.py [--fixtures DIR] [--wakewords alexa hey_jarvis] [--output results.json]
+"""
+import os
+import argparse
+import time
+
+from fixtures import DEFAULT_FIXTURES_DIR, load_fixtures, chunks, summarize, write_json
+from voice_detection_module import resolve_wakeword_models
+from wakeword_gate import WakeWordGate
+
+
+def score_fixture(model, thresholds, audio, chunk_size, rate, gate=None):
+    """CPU time per chunk and the first (keyword, time) that crossed its threshold."""
+    model.reset()
+    if gate is not None:
+        gate.reset()
+    cpu, fired = [], None
+    for index, chunk in enumerate(chunks(audio, chunk_size)):
+        started = time.perf_counter()
+        if gate is not None:
+            chunk = gate.admit(chunk)
+            if chunk is None:
+                cpu.append(time.perf_counter() - started)
+                continue
+        prediction = model.predict(chunk)
+        cpu.append(time.perf_counter() - started)
+        if fired is None:
+            over = [(score - thresholds.get(name, 1.0), name) for name, score in prediction.items()]
+            margin, name = max(over)
+            if margin > 0:
+                fired = (name, (index + 1) * chunk_size / rate)
+    return cpu, fired
+
+
+def run(fixtures_dir, wakewords, threshold=0.3, rate=16000, chunk_size=1280):
+    from openwakeword.model import Model
+
+    fixtures = load_fixtures(fixtures_dir, rate)
+    all_models = resolve_wakeword_models(wakewords, threshold)
+    first_path = next(iter(all_models))
+    configurations = {"single": ({first_path: all_models[first_path]}, False),
+                      "all": (all_models, False),
+                      "all_low_power": (all_models, True)}
+    results = {"rate": rate, "chunk_size": chunk_size, "wakewords": list(wakewords),
+               "fixtures": len(fixtures), "configurations": {}}
+    for label, (models, low_power) in configurations.items():
+        model = Model(wakeword_models=list(models), inference_framework="onnx")
+        thresholds = {os.path.splitext(os.path.basename(path))[0]: value for path, value in models.items()}
+        gate = WakeWordGate(rate, chunk_size) if low_power else None
+        cpu_per_chunk, per_fixture = [], []
+        hits = expected_count = false_fires = 0
+        for fixture in fixtures:
+            cpu, fired = score_fixture(model, thresholds, fixture["audio"], chunk_size, rate, gate)
+            cpu_per_chunk.extend(cpu)
+            expected = fixture.get("keyword")
+            if expected:
+                expected_count += 1
+                hits += bool(fired and fired[0].startswith(expected))
+            elif fired:
+                false_fires += 1
+            entry = {"file": fixture["file"], "expected": expected,
+                     "fired": fired[0] if fired else None, "fired_at_s": fired[1] if fired else None}
+            if fired and fixture.get("keyword_end_s") is not None:
+                entry["latency_s"] = fired[1] - fixture["keyword_end_s"]
+            per_fixture.append(entry)
+        results["configurations"][label] = {
+            "models": list(thresholds),
+            "cpu_per_chunk_s": summarize(cpu_per_chunk),
+            "recall": hits / expected_count if expected_count else None,
+            "false_fires": false_fires,
+            "gate": gate.stats() if gate else None,
+            "per_fixture": per_fixture,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR)
+    parser.add_argument("--wakewords", nargs="+", default=["alexa", "hey_jarvis", "hey_mycroft", "hey_rhasspy"])
+    parser.add_argument("--threshold", type=float, default=0.3)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    write_json(run(args.fixtures, args.wakewords, args.threshold), args.output)
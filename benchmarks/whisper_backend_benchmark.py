@@ -0,0 +1,67 @@
+"""Compare transcription backends on speed (real-time factor) and accuracy (WER).
+
+Transcribes every fixture that has a ``transcript`` label with each backend
+and model size, after the same noise reduction and trimming the detector
+applies, and reports per configuration:
+
+- load_s: model load (and quantization) time
+- rtf: decode time divided by audio duration (below 1 is faster than real time)
+- wer: word error rate against the labelled transcript
+
+Usage: python benchmarks/whisper_backend_benchmark.py [--fixtures DIR] [--backends whisper whisper-int8] [--models tiny base] [--output results.json]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from fixtures import DEFAULT_FIXTURES_DIR, load_fixtures, summarize, word_error_rate, write_json
+from transcription_backends import create_transcription_backend
+from voice_detection_module import CombinedDetector, MODELS_DIR
+
+
+def run(fixtures_dir, backends, models, language="it", rate=16000, device=None, denoise="nr"):
+    fixtures = load_fixtures(fixtures_dir, rate, require=("transcript",))
+    # Only used for its audio preprocessing, which does not need the models
+    preprocessor = CombinedDetector(rate=rate, denoise=denoise)
+    inputs = [preprocessor.process_audio(fixture["audio"]).astype(np.float32, copy=False) for fixture in fixtures]
+    results = {"rate": rate, "language": language, "fixtures": len(fixtures), "configurations": {}}
+    for backend_name in backends:
+        for model in models:
+            backend = create_transcription_backend(backend_name, model, MODELS_DIR, device)
+            started = time.perf_counter()
+            backend.load()
+            load_s = time.perf_counter() - started
+            rtfs, wers, per_fixture = [], [], []
+            for fixture, audio in zip(fixtures, inputs):
+                started = time.perf_counter()
+                text = backend.transcribe(audio, language=language)["text"].strip()
+                decode_s = time.perf_counter() - started
+                rtf = decode_s / max(len(audio) / rate, 1e-6)
+                wer = word_error_rate(fixture["transcript"], text)
+                rtfs.append(rtf)
+                wers.append(wer)
+                per_fixture.append({"file": fixture["file"], "text": text, "rtf": rtf, "wer": wer})
+            results["configurations"][f"{backend_name}/{model}"] = {
+                "backend": backend_name,
+                "model": model,
+                "device": backend.device,
+                "load_s": load_s,
+                "rtf": summarize(rtfs),
+                "wer": summarize(wers),
+                "per_fixture": per_fixture,
+            }
+            del backend
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR)
+    parser.add_argument("--backends", nargs="+", default=["whisper", "whisper-int8"])
+    parser.add_argument("--models", nargs="+", default=["tiny", "base"])
+    parser.add_argument("--language", default="it")
+    parser.add_argument("--device", help="force a device for the backends that support several (cpu, cuda)")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    write_json(run(args.fixtures, args.backends, args.models, args.language, device=args.device), args.output)
@@ -20,6 +20,7 @@ class FileExplorerWidget(QWidget):
         self.setup_ui(default_path)
 
     def update_ui(self,updated_path):
+        self.root_path = updated_path
         self.model.setRootPath(updated_path)
         self.tree_view.setRootIndex(self.model.index(updated_path))
         
@@ -27,7 +28,20 @@ class FileExplorerWidget(QWidget):
         path = self.sender().model().filePath(index)
         self.simple_ide.add_file_to_tabs(path)
 
+    def list_files(self, max_files=500):
+        """Files under the shown folder, without touching the Qt model (safe off the GUI thread)."""
+        files = []
+        for root, dirs, names in os.walk(self.root_path):
+            dirs[:] = [d for d in dirs if not d.startswith(".") and d not in ("__pycache__", "node_modules", "venv")]
+            for name in names:
+                if not name.startswith("."):
+                    files.append(os.path.join(root, name))
+                    if len(files) >= max_files:
+                        return files
+        return files
+
     def setup_ui(self,path_to_show):
+        self.root_path = path_to_show
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
         layout.setSpacing(0)
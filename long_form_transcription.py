@@ -0,0 +1,108 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from audio_features import frame_db
+from transcription_backends import create_transcription_backend
+
+
+def find_split_points(audio, rate, max_segment_s=30.0, search_s=8.0, frame_s=0.02, pause_s=0.3):
+    """Cut points so no segment is longer than ``max_segment_s``.
+
+    Each cut is placed in the quietest ``pause_s`` stretch within the last
+    ``search_s`` seconds before the limit, so words are not split in half.
+    Returns the segment boundaries as sample indices, including 0 and len(audio).
+    """
+    max_samples = int(max_segment_s * rate)
+    if len(audio) <= max_samples:
+        return [0, len(audio)]
+
+    frame_samples = max(1, int(frame_s * rate))
+    levels = frame_db(audio, frame_samples)
+    # Average over a pause-sized window so a single quiet frame inside a word doesn't win
+    pause_frames = max(1, int(pause_s / frame_s))
+    smoothed = np.convolve(levels, np.ones(pause_frames) / pause_frames, mode="same")
+
+    cuts = [0]
+    while len(audio) - cuts[-1] > max_samples:
+        limit = cuts[-1] + max_samples
+        search_start = max(cuts[-1] + 1, limit - int(search_s * rate))
+        first = -(-search_start // frame_samples)  # first whole frame in the search window
+        last = limit // frame_samples
+        if last <= first:
+            cut = limit
+        else:
+            cut = (first + int(np.argmin(smoothed[first:last]))) * frame_samples + frame_samples // 2
+        cuts.append(min(cut, limit))
+    cuts.append(len(audio))
+    return cuts
+
+
+# Model held by each worker process
+_worker_model = None
+
+
+def _init_worker(backend, model_version, model_dir, torch_threads):
+    global _worker_model
+    import torch
+    # Split the cores between the workers instead of oversubscribing them
+    torch.set_num_threads(torch_threads)
+    _worker_model = create_transcription_backend(backend, model_version, model_dir, device="cpu")
+    _worker_model.load()
+
+
+def _transcribe_segment(args):
+    audio, language, offset_s = args
+    result = _worker_model.transcribe(audio, language=language)
+    return offset_segments(result, offset_s)
+
+
+def offset_segments(result, offset_s):
+    """Whisper result for a segment, with timestamps shifted to the whole recording."""
+    return {
+        "text": result["text"].strip(),
+        "segments": [dict(seg, start=seg["start"] + offset_s, end=seg["end"] + offset_s)
+                     for seg in result.get("segments", [])],
+    }
+
+
+def merge_results(results):
+    """Join per-segment results into one transcription with absolute timestamps."""
+    return {
+        "text": " ".join(r["text"] for r in results if r["text"]),
+        "segments": [seg for r in results for seg in r["segments"]],
+    }
+
+
+class LongFormTranscriber:
+    """Transcribes long recordings on CPU worker processes, each holding a model copy."""
+
+    def __init__(self, model_version, model_dir, language, workers=None, backend="whisper"):
+        cpu_count = os.cpu_count() or 2
+        self.backend = backend  # transcription backend name, created in each worker
+        self.model_version = model_version
+        self.model_dir = model_dir
+        self.language = language
+        self.workers = workers or max(1, min(4, cpu_count // 2))
+        self.torch_threads = max(1, cpu_count // self.workers)
+        self.executor = None
+
+    def _get_executor(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.backend, self.model_version, self.model_dir, self.torch_threads))
+        return self.executor
+
+    def transcribe(self, audio, rate, cuts=None):
+        """Transcribe float32 ``audio`` segment by segment in parallel."""
+        if cuts is None:
+            cuts = find_split_points(audio, rate)
+        jobs = [(audio[start:end], self.language, start / rate)
+                for start, end in zip(cuts[:-1], cuts[1:])]
+        return merge_results(list(self._get_executor().map(_transcribe_segment, jobs)))
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
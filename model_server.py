@@ -0,0 +1,212 @@
+"""Local model server: one loaded Whisper model shared by several IDE windows.
+
+Each IDE process that uses ``CombinedDetector(whisper_backend="server")``
+connects to the server over a local socket (multiprocessing.connection,
+authenticated with a per-user key), and spawns it if it isn't running.
+Models are loaded once per (backend, model) and released, together with
+the server process, after ``idle_timeout_s`` without any connected client.
+
+Usage: python model_server.py [--port 47219] [--idle-timeout 600]
+"""
+import os
+import sys
+import time
+import secrets
+import argparse
+import threading
+import subprocess
+from multiprocessing.connection import Listener, Client
+
+from transcription_backends import TranscriptionBackend, create_transcription_backend
+from process_memory import release_memory, rss_bytes
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 47219
+KEY_PATH = os.path.join(os.path.expanduser("~"), ".cache", "aidee", "model_server.key")
+
+
+def _authkey():
+    """Per-user secret shared by the server and its clients."""
+    if not os.path.isfile(KEY_PATH):
+        os.makedirs(os.path.dirname(KEY_PATH), exist_ok=True)
+        fd = os.open(KEY_PATH, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(secrets.token_bytes(32))
+    with open(KEY_PATH, "rb") as f:
+        return f.read()
+
+
+class ModelServer:
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, idle_timeout_s=600):
+        self.address = (host, port)
+        self.idle_timeout_s = idle_timeout_s
+        self.backends = {}  # (backend, model_version, model_dir) -> loaded TranscriptionBackend
+        self.backends_lock = threading.Lock()
+        self.model_lock = threading.Lock()  # one decode at a time, whichever window asks
+        self.clients = 0
+        self.last_activity = time.monotonic()
+
+    def serve_forever(self):
+        listener = Listener(self.address, authkey=_authkey())
+        print(f"Model server listening on {self.address[0]}:{self.address[1]} (pid {os.getpid()})")
+        threading.Thread(target=self._watch_idle, daemon=True).start()
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                # Wrong key or a client that went away during the handshake
+                print(f"Rejected model server connection: {e}")
+                continue
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _watch_idle(self):
+        while True:
+            time.sleep(5)
+            if self.clients == 0 and time.monotonic() - self.last_activity > self.idle_timeout_s:
+                print("Model server idle, exiting")
+                os._exit(0)
+
+    def _backend(self, key):
+        with self.backends_lock:
+            backend = self.backends.get(key)
+            if backend is None:
+                backend = create_transcription_backend(*key)
+                backend.load()
+                self.backends[key] = backend
+            return backend
+
+    def _handle(self, conn):
+        self.clients += 1
+        try:
+            while True:
+                op, args = conn.recv()
+                self.last_activity = time.monotonic()
+                try:
+                    conn.send(("ok", self._dispatch(op, args)))
+                except Exception as e:
+                    conn.send(("error", f"{type(e).__name__}: {e}"))
+        except (EOFError, OSError):
+            pass
+        finally:
+            self.clients -= 1
+            self.last_activity = time.monotonic()
+            conn.close()
+
+    def _dispatch(self, op, args):
+        if op == "load":
+            backend = self._backend(args)
+            return {"device": backend.device, "pid": os.getpid()}
+        if op in ("transcribe", "decode_short"):
+            key, audio, options = args
+            backend = self._backend(key)
+            with self.model_lock:
+                return getattr(backend, op)(audio, **options)
+        if op == "unload":
+            with self.backends_lock:
+                backend = self.backends.pop(args, None)
+            if backend is not None:
+                backend.unload()
+                release_memory()
+            return backend is not None
+        if op == "stats":
+            return {"pid": os.getpid(), "rss": rss_bytes(), "clients": self.clients,
+                    "models": [list(key[:2]) for key in self.backends]}
+        raise ValueError(f"Unknown model server request '{op}'")
+
+
+def connect(host=DEFAULT_HOST, port=DEFAULT_PORT, spawn=True, timeout_s=30.0):
+    """Connection to the model server, starting it in the background if needed."""
+    try:
+        return Client((host, port), authkey=_authkey())
+    except OSError:
+        if not spawn:
+            raise
+    command = [sys.executable, os.path.abspath(__file__), "--host", host, "--port", str(port)]
+    if sys.platform == "win32":
+        subprocess.Popen(command, creationflags=subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP,
+                         stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    else:
+        subprocess.Popen(command, start_new_session=True,
+                         stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout_s
+    while True:
+        time.sleep(0.2)
+        try:
+            return Client((host, port), authkey=_authkey())
+        except OSError:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Model server did not start on {host}:{port}")
+
+
+class ModelServerBackend(TranscriptionBackend):
+    """Transcription backend that forwards to the shared model server.
+
+    ``server_backend`` is the backend the server runs ("whisper" or
+    "whisper-int8"). The device is reported as "remote", so long
+    recordings are not fanned out to local worker processes.
+    """
+
+    name = "server"
+
+    def __init__(self, model_version="base", model_dir=None, device=None, server_backend="whisper",
+                 host=DEFAULT_HOST, port=DEFAULT_PORT):
+        super().__init__(model_version, model_dir, device)
+        self.key = (server_backend, model_version, model_dir)
+        self.host = host
+        self.port = port
+        self.conn = None
+        self.lock = threading.Lock()
+        self.server_device = None
+        self.server_pid = None
+
+    def load(self):
+        if self.conn is not None:
+            return
+        self.conn = connect(self.host, self.port)
+        info = self._call("load", self.key)
+        self.server_device = info["device"]
+        self.server_pid = info["pid"]
+        self.device = "remote"
+
+    def _call(self, op, args):
+        with self.lock:
+            for attempt in range(2):
+                try:
+                    if self.conn is None:
+                        self.conn = connect(self.host, self.port)
+                        if op != "load":
+                            self.conn.send(("load", self.key))
+                            self.conn.recv()
+                    self.conn.send((op, args))
+                    status, result = self.conn.recv()
+                    break
+                except (EOFError, OSError):
+                    # The server exited (idle or crashed): start it again once
+                    self.conn = None
+                    if attempt:
+                        raise
+        if status != "ok":
+            raise RuntimeError(f"Model server: {result}")
+        return result
+
+    def transcribe(self, audio, language=None, **options):
+        return self._call("transcribe", (self.key, audio, dict(options, language=language)))
+
+    def decode_short(self, audio, language=None, prompt=None, max_tokens=32):
+        return self._call("decode_short", (self.key, audio,
+                                           {"language": language, "prompt": prompt, "max_tokens": max_tokens}))
+
+    def unload(self):
+        # The server keeps the model for the other windows and exits once nobody is connected
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--idle-timeout", type=float, default=600, help="seconds without clients before exiting")
+    args = parser.parse_args()
+    ModelServer(args.host, args.port, args.idle_timeout).serve_forever()
@@ -0,0 +1,121 @@
+import numpy as np
+from audio_ring_buffer import AudioRingBuffer
+from audio_features import to_float
+
+
+class NoiseProfile:
+    """Stationary noise estimate learned from idle audio and kept between utterances.
+
+    Holds the average power spectrum of the noise (for spectral subtraction)
+    and the most recent ``clip_s`` seconds of idle audio (for noisereduce's
+    ``y_noise``), so the noise statistics are not re-estimated per utterance.
+    """
+
+    def __init__(self, rate=16000, n_fft=512, smoothing=0.05, min_frames=30, clip_s=2.0):
+        self.rate = rate
+        self.n_fft = n_fft
+        self.smoothing = smoothing
+        self.min_frames = min_frames
+        # Periodic sqrt-Hann: analysis * synthesis windows sum to one at 50 % overlap
+        self.window = np.sqrt(0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n_fft) / n_fft)).astype(np.float32)
+        self.power = None
+        self.frames = 0
+        self.clip = AudioRingBuffer(int(clip_s * rate), dtype=np.float32)
+
+    @property
+    def ready(self):
+        return self.frames >= self.min_frames
+
+    @property
+    def level_db(self):
+        """Noise level in dBFS, or None before anything was learned."""
+        if self.power is None:
+            return None
+        # Parseval over the one-sided spectrum: mean power per sample of a windowed frame
+        return 10 * np.log10(2 * np.sum(self.power) / (self.n_fft * np.sum(self.window ** 2)) + 1e-10)
+
+    def update(self, power_frames, audio):
+        """Fold frame power spectra of idle audio into the estimate."""
+        if len(power_frames) == 0:
+            return
+        frame_power = power_frames.mean(axis=0)
+        if self.power is None:
+            self.power = frame_power
+        else:
+            # Learn fast until ready, then track slow changes of the room
+            rate = 1.0 / (self.frames + 1) if not self.ready else self.smoothing
+            self.power = (1 - rate) * self.power + rate * frame_power
+        self.frames += len(power_frames)
+        self.clip.write(audio)
+
+    def noise_clip(self):
+        return np.array(self.clip.latest(len(self.clip)))
+
+    def reset(self):
+        self.power = None
+        self.frames = 0
+        self.clip.reset()
+
+
+class SpectralSubtractor:
+    """Streaming stationary spectral subtraction, chunk by chunk.
+
+    Short-time FFT with a square-root Hann window and 50 % overlap-add, so
+    with a gain of one the input is reconstructed exactly, delayed by
+    ``latency`` samples. Each bin is scaled by
+    ``max(1 - over_subtraction * noise / power, floor)``; idle chunks also
+    update the noise profile from the same FFT. Bypassed chunks skip the
+    FFT and come out unchanged, with the same delay.
+    """
+
+    def __init__(self, profile, over_subtraction=1.5, floor=0.1):
+        self.profile = profile
+        self.n_fft = profile.n_fft
+        self.hop = self.n_fft // 2
+        self.latency = self.n_fft - self.hop
+        self.over_subtraction = over_subtraction
+        self.floor = floor
+        self.window = profile.window
+        self.reset()
+
+    def reset(self):
+        self.input_tail = np.zeros(self.latency, dtype=np.float32)
+        self.output_tail = np.zeros(self.latency, dtype=np.float32)
+
+    def process(self, chunk, learn=False, bypass=False):
+        """Denoise one chunk; returns as many samples as were not held back (float32)."""
+        buffer = np.concatenate([self.input_tail, to_float(chunk).astype(np.float32, copy=False)])
+        n_frames = (len(buffer) - self.n_fft) // self.hop + 1
+        if n_frames <= 0:
+            self.input_tail = buffer
+            return np.zeros(0, dtype=np.float32)
+        if bypass and not learn:
+            return self._pass_through(buffer, n_frames)
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, self.n_fft)[::self.hop][:n_frames]
+        spectrum = np.fft.rfft(frames * self.window, axis=1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        if learn:
+            self.profile.update(power, buffer[-len(chunk):])
+        if self.profile.ready:
+            gain = np.maximum(1.0 - self.over_subtraction * self.profile.power / (power + 1e-12), self.floor)
+            spectrum *= gain
+        frames_out = np.fft.irfft(spectrum, n=self.n_fft, axis=1).astype(np.float32) * self.window
+
+        output = np.zeros(n_frames * self.hop + self.latency, dtype=np.float32)
+        output[:self.latency] += self.output_tail
+        for i in range(n_frames):
+            output[i * self.hop:i * self.hop + self.n_fft] += frames_out[i]
+        consumed = n_frames * self.hop
+        self.output_tail = output[consumed:]
+        self.input_tail = buffer[consumed:]
+        return output[:consumed]
+
+    def _pass_through(self, buffer, n_frames):
+        # Overlap-add with unit gain, without the FFT: the squared windows sum to one,
+        # so only the first hop (overlapping the previous chunk's tail) and the new tail need them
+        consumed = n_frames * self.hop
+        output = buffer[:consumed].copy()
+        output[:self.latency] = self.output_tail + buffer[:self.latency] * self.window[:self.latency] ** 2
+        self.output_tail = buffer[consumed:consumed + self.latency] * self.window[self.hop:] ** 2
+        self.input_tail = buffer[consumed:]
+        return output
@@ -0,0 +1,141 @@
+import os
+import re
+import codecs
+import asyncio
+import threading
+
+# CSI/OSC/two-character escape sequences; the terminal view shows plain text
+ANSI_ESCAPE = re.compile(r"\x1b(\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b]*(\x07|\x1b\\)|[@-Z\\-_])")
+
+
+class LineDecoder:
+    """Turns chunks of process output into display lines.
+
+    Decodes incrementally, so multi-byte characters split across reads
+    survive. A carriage return keeps only the text after it, the way a
+    terminal redraws a progress bar, and escape sequences are stripped.
+    """
+
+    def __init__(self, encoding="utf-8"):
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self.partial = ""
+
+    def feed(self, data):
+        """Complete lines in ``data``; the text after the last newline is kept in ``partial``."""
+        lines = (self.partial + self.decoder.decode(data)).split("\n")
+        self.partial = lines.pop()
+        return [self.clean(line) for line in lines]
+
+    def flush(self):
+        """The pending partial line (a prompt, a progress bar) as a line of its own, or None."""
+        rest = self.partial + self.decoder.decode(b"", final=True)
+        self.partial = ""
+        return self.clean(rest) if rest else None
+
+    @staticmethod
+    def clean(line):
+        line = line.rstrip("\r")
+        if "\r" in line:
+            line = line.rsplit("\r", 1)[1]
+        return ANSI_ESCAPE.sub("", line)
+
+
+async def pump_lines(reader, on_line, encoding="utf-8", partial_flush_s=0.1):
+    """Read ``reader`` (an asyncio StreamReader) to the end, calling ``on_line`` per line.
+
+    Text without a newline is delivered once the stream has been quiet
+    for ``partial_flush_s``, so prompts show up before the user answers.
+    """
+    decoder = LineDecoder(encoding)
+    while True:
+        try:
+            if decoder.partial:
+                data = await asyncio.wait_for(reader.read(65536), partial_flush_s)
+            else:
+                data = await reader.read(65536)
+        except asyncio.TimeoutError:
+            on_line(decoder.flush())
+            continue
+        except OSError:
+            data = b""  # EIO: the other side of a PTY is gone
+        if not data:
+            break
+        for line in decoder.feed(data):
+            on_line(line)
+    rest = decoder.flush()
+    if rest is not None:
+        on_line(rest)
+
+
+async def open_fd_reader(fd):
+    """StreamReader over a file descriptor (a PTY master or a pipe), which it takes ownership of."""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(fd, "rb", 0))
+    return reader
+
+
+class ProcessEngine:
+    """An asyncio event loop on one background thread, running every terminal's processes.
+
+    Code on other threads hands it coroutines with ``submit`` and gets a
+    concurrent.futures.Future back (awaitable from another loop with
+    ``asyncio.wrap_future``). Processes are started with
+    ``asyncio.create_subprocess_exec`` and read with stream readers, so
+    any number of them share this one thread.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            ready = threading.Event()
+            self.thread = threading.Thread(target=self._run, args=(ready,), name="process-engine", daemon=True)
+            self.thread.start()
+        ready.wait()
+
+    def _run(self, ready):
+        # The default loop is a ProactorEventLoop on Windows, which supports subprocess pipes
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(ready.set)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def submit(self, coro):
+        """Run a coroutine on the engine; returns a concurrent.futures.Future."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_soon(self, callback, *args):
+        """Run a plain callback on the engine thread."""
+        self.start()
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def stop(self):
+        with self.lock:
+            if self.loop is None or self.thread is None:
+                return
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=2)
+            self.thread = None
+
+
+_shared_engine = None
+_shared_engine_lock = threading.Lock()
+
+
+def get_process_engine():
+    """The process-wide engine shared by all terminals."""
+    global _shared_engine
+    with _shared_engine_lock:
+        if _shared_engine is None:
+            _shared_engine = ProcessEngine()
+        return _shared_engine
@@ -58,6 +58,7 @@ class ProjectManager:
     def update_project_json(self, path, data):
         """
         Creates or updates the project.aide.json file in the project directory.
+        Keys already in the file and not in data (e.g. audio settings) are kept.
         Makes the file hidden on Windows systems.
         
         Args:
@@ -66,6 +67,7 @@ class ProjectManager:
         """
         filename = "project.aide.json"
         full_path = os.path.join(path, filename)
+        data = dict(self.read_project_json(path), **data)
 
         # On Windows, remove hidden attribute if file exists
         if sys.platform == "win32" and os.path.exists(full_path):
@@ -80,6 +82,27 @@ class ProjectManager:
         if sys.platform == "win32":
             FILE_ATTRIBUTE_HIDDEN = 0x02
             ctypes.windll.kernel32.SetFileAttributesW(full_path, FILE_ATTRIBUTE_HIDDEN)
+    def read_project_json(self, path):
+        """
+        Reads the project.aide.json file of a project directory.
+
+        Args:
+            path (str): Project directory path
+
+        Returns:
+            dict: Project configuration data, empty if missing or unreadable
+        """
+        full_path = os.path.join(path, "project.aide.json")
+        if not os.path.isfile(full_path):
+            return {}
+        try:
+            with open(full_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not read {full_path}: {e}")
+            return {}
+        return data if isinstance(data, dict) else {}
+
     def create_new_project(self, project_path):
         """
         Creates a new project entry with the given path.
@@ -1,9 +1,17 @@
 import sys
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import Qt
-from Aidee import SimpleIDE
-from welcome_window import WelcomeWindow
+import startup_profiler
+
+# Everything runs under the main guard: the voice engine process is started with
+# "spawn", which re-imports this module as __mp_main__ and must not load the GUI
 if __name__ == '__main__':
+    # Must run before the heavy imports below so their import time is recorded
+    profiler = startup_profiler.enable_from_argv(sys.argv)
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import Qt
+    with startup_profiler.span("import Aidee"):
+        from Aidee import SimpleIDE
+    from welcome_window import WelcomeWindow
+
     # Enable DPI scale
     QApplication.setHighDpiScaleFactorRoundingPolicy(
         Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
@@ -12,9 +20,14 @@ if __name__ == '__main__':
     
     app = QApplication(sys.argv)
     app.setAttribute(Qt.AA_DontCreateNativeWidgetSiblings)
+    if profiler:
+        app.aboutToQuit.connect(profiler.print_summary)
+        app.aboutToQuit.connect(profiler.write_report)
     
-    window = WelcomeWindow()
+    with startup_profiler.span("WelcomeWindow"):
+        window = WelcomeWindow()
     window.resize(800, 600)
+    startup_profiler.watch_first_paint(window, "WelcomeWindow")
     window.show()
     
-    sys.exit(app.exec_())
\ No newline at end of file
+    sys.exit(app.exec_())
@@ -0,0 +1,152 @@
+from PyQt5.QtWidgets import QAbstractScrollArea, QApplication, QMenu
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPainter, QColor, QKeySequence
+from terminal_scrollback import STYLE_OUTPUT, STYLE_ERROR, STYLE_COMMAND
+
+
+class ScrollbackView(QAbstractScrollArea):
+    """Read-only terminal output view that only lays out the lines on screen.
+
+    The vertical scroll bar's value is the number of the top line, so
+    painting costs the same with 100 or 100 000 lines of scrollback.
+    Lines don't wrap; long ones scroll horizontally. Selection is by whole
+    lines (drag, Ctrl+A) and is copied with Ctrl+C or the context menu.
+    """
+
+    def __init__(self, scrollback, parent=None):
+        super().__init__(parent)
+        self.scrollback = scrollback
+        self.padding = 6
+        self.colors = {STYLE_OUTPUT: QColor("#D1D5DB"), STYLE_ERROR: QColor("#EF4444"),
+                       STYLE_COMMAND: QColor("#34D399")}
+        self.background = QColor("#1E1F2A")
+        self.selection_color = QColor("#4B5563")
+        self.selection = None  # (anchor line, current line)
+        self.setFocusPolicy(Qt.ClickFocus)
+        self.viewport().setCursor(Qt.IBeamCursor)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+
+    def set_colors(self, text, error, prompt, background, selection):
+        self.colors = {STYLE_OUTPUT: QColor(text), STYLE_ERROR: QColor(error), STYLE_COMMAND: QColor(prompt)}
+        self.background = QColor(background)
+        self.selection_color = QColor(selection)
+        self.viewport().update()
+
+    def _line_height(self):
+        return self.fontMetrics().height()
+
+    def _visible_lines(self):
+        return max(1, (self.viewport().height() - 2 * self.padding) // self._line_height())
+
+    def is_at_end(self):
+        bar = self.verticalScrollBar()
+        return bar.value() >= bar.maximum()
+
+    def refresh(self, follow=None):
+        """Update the scroll ranges after lines were appended or cleared.
+
+        The view stays pinned to the newest line if it was showing it
+        (or when ``follow`` is True).
+        """
+        if follow is None:
+            follow = self.is_at_end()
+        visible = self._visible_lines()
+        bar = self.verticalScrollBar()
+        bar.setRange(self.scrollback.first, max(self.scrollback.first, self.scrollback.total - visible))
+        bar.setPageStep(visible)
+        bar.setSingleStep(1)
+        content_width = self.scrollback.max_length * self.fontMetrics().averageCharWidth() + 2 * self.padding
+        hbar = self.horizontalScrollBar()
+        hbar.setRange(0, max(0, content_width - self.viewport().width()))
+        hbar.setPageStep(self.viewport().width())
+        if follow:
+            bar.setValue(bar.maximum())
+        self.viewport().update()
+
+    def scroll_to_line(self, number):
+        bar = self.verticalScrollBar()
+        bar.setValue(min(bar.maximum(), max(bar.minimum(), number - self._visible_lines() // 2)))
+
+    def select_lines(self, start, end):
+        self.selection = (start, end)
+        self.viewport().update()
+
+    def _selected_range(self):
+        if self.selection is None:
+            return None
+        start, end = sorted(self.selection)
+        return max(start, self.scrollback.first), end
+
+    def selected_text(self):
+        selected = self._selected_range()
+        if selected is None:
+            return ""
+        return self.scrollback.text(selected[0], selected[1] + 1)
+
+    def copy(self):
+        text = self.selected_text()
+        if text:
+            QApplication.clipboard().setText(text)
+
+    def select_all(self):
+        if self.scrollback.total:
+            self.select_lines(self.scrollback.first, self.scrollback.total - 1)
+
+    def clear_selection(self):
+        self.selection = None
+        self.viewport().update()
+
+    def _line_at(self, y):
+        line = self.verticalScrollBar().value() + max(0, y - self.padding) // self._line_height()
+        return min(line, max(self.scrollback.total - 1, 0))
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.setFont(self.font())
+        painter.fillRect(event.rect(), self.background)
+        metrics = self.fontMetrics()
+        line_height = metrics.height()
+        top = self.verticalScrollBar().value()
+        x = self.padding - self.horizontalScrollBar().value()
+        width = self.viewport().width()
+        selected = self._selected_range()
+        for row, (text, style) in enumerate(self.scrollback.lines(top, self._visible_lines() + 1)):
+            y = self.padding + row * line_height
+            if selected is not None and selected[0] <= top + row <= selected[1]:
+                painter.fillRect(0, y, width, line_height, self.selection_color)
+            painter.setPen(self.colors.get(style, self.colors[STYLE_OUTPUT]))
+            painter.drawText(x, y + metrics.ascent(), text)
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def resizeEvent(self, event):
+        follow = self.is_at_end()
+        super().resizeEvent(event)
+        self.refresh(follow)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            line = self._line_at(event.pos().y())
+            self.select_lines(line, line)
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton and self.selection is not None:
+            self.select_lines(self.selection[0], self._line_at(event.pos().y()))
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy):
+            self.copy()
+        elif event.matches(QKeySequence.SelectAll):
+            self.select_all()
+        else:
+            super().keyPressEvent(event)
+
+    def contextMenuEvent(self, event):
+        menu = QMenu(self)
+        copy_action = menu.addAction("Copy")
+        copy_action.setEnabled(self.selection is not None)
+        copy_action.triggered.connect(self.copy)
+        menu.addAction("Select All").triggered.connect(self.select_all)
+        menu.exec_(event.globalPos())
@@ -0,0 +1,208 @@
+import sys
+import os
+import json
+import time
+import platform
+from contextlib import contextmanager, nullcontext
+from importlib.abc import MetaPathFinder
+
+# Enable with `python run.py --profile-startup[=report.json]` or AIDEE_PROFILE_STARTUP=1|report.json
+CLI_FLAG = "--profile-startup"
+ENV_VAR = "AIDEE_PROFILE_STARTUP"
+DEFAULT_REPORT = "startup_profile.json"
+
+_profiler = None
+
+
+class _TimedLoader:
+    """Wraps a module loader to time exec_module, like `python -X importtime`."""
+
+    def __init__(self, loader, profiler, name):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler._import_started(self._name)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._import_finished(self._name)
+
+    def __getattr__(self, attr):
+        # Resource readers, get_data, is_package... go to the real loader
+        return getattr(self._loader, attr)
+
+
+class _TimingFinder(MetaPathFinder):
+    def __init__(self, profiler):
+        self._profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self._profiler, fullname)
+                return spec
+        return None
+
+
+class StartupProfiler:
+    """Collects import times, construction spans and first-paint marks for one run."""
+
+    def __init__(self, report_path=DEFAULT_REPORT):
+        self.report_path = report_path
+        self.t0 = time.perf_counter()
+        self.imports = {}       # module -> {"inclusive_s", "self_s", "start_s"}
+        self.spans = []         # {"name", "start_s", "duration_s"}
+        self.marks = {}         # event name -> seconds since start
+        self._import_stack = []  # [name, started_at, children_s]
+        self._finder = None
+        self._paint_filters = []
+
+    def elapsed(self):
+        return time.perf_counter() - self.t0
+
+    def install_import_hook(self):
+        if self._finder is None:
+            self._finder = _TimingFinder(self)
+            sys.meta_path.insert(0, self._finder)
+
+    def remove_import_hook(self):
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+        self._finder = None
+
+    def _import_started(self, name):
+        self._import_stack.append([name, time.perf_counter(), 0.0])
+
+    def _import_finished(self, name):
+        name, started, children = self._import_stack.pop()
+        inclusive = time.perf_counter() - started
+        self.imports[name] = {
+            "start_s": started - self.t0,
+            "inclusive_s": inclusive,
+            "self_s": inclusive - children,
+        }
+        if self._import_stack:
+            self._import_stack[-1][2] += inclusive
+
+    @contextmanager
+    def span(self, name):
+        """Time the body, e.g. the construction of a widget."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append({
+                "name": name,
+                "start_s": started - self.t0,
+                "duration_s": time.perf_counter() - started,
+            })
+
+    def mark(self, name):
+        """Record the first time an event happens."""
+        self.marks.setdefault(name, self.elapsed())
+
+    def watch_first_paint(self, widget, name):
+        """Mark `first_paint:<name>` when the widget receives its first paint event."""
+        from PyQt5.QtCore import QObject, QEvent
+
+        profiler = self
+
+        class FirstPaintFilter(QObject):
+            def eventFilter(self, obj, event):
+                if event.type() == QEvent.Paint:
+                    obj.removeEventFilter(self)
+                    profiler.mark(f"first_paint:{name}")
+                    profiler.write_report()
+                return False
+
+        paint_filter = FirstPaintFilter(widget)
+        widget.installEventFilter(paint_filter)
+        self._paint_filters.append(paint_filter)
+
+    def report(self):
+        imports = sorted(
+            ({"module": module, **timing} for module, timing in self.imports.items()),
+            key=lambda entry: entry["inclusive_s"], reverse=True)
+        return {
+            "created": time.time(),
+            "python": sys.version,
+            "platform": platform.platform(),
+            "elapsed_s": self.elapsed(),
+            "marks": self.marks,
+            "spans": self.spans,
+            "imports": imports,
+        }
+
+    def write_report(self, path=None):
+        path = path or self.report_path
+        try:
+            with open(path, "w") as f:
+                json.dump(self.report(), f, indent=4)
+        except OSError as e:
+            print(f"Could not write startup profile to {path}: {e}")
+
+    def print_summary(self, top=15):
+        print(f"Startup profile ({self.elapsed():.3f}s), report: {self.report_path}")
+        for name, at in sorted(self.marks.items(), key=lambda item: item[1]):
+            print(f"  {at:8.3f}s  {name}")
+        for span in self.spans:
+            print(f"  {span['duration_s']:8.3f}s  construct {span['name']}")
+        print("  slowest imports (inclusive / self):")
+        for entry in self.report()["imports"][:top]:
+            print(f"  {entry['inclusive_s']:8.3f}s / {entry['self_s']:.3f}s  {entry['module']}")
+
+
+def enable_from_argv(argv):
+    """Enable profiling if requested on the command line or environment.
+
+    Removes the profiler flag from ``argv`` so Qt never sees it.
+    """
+    report_path = None
+    for arg in list(argv[1:]):
+        if arg == CLI_FLAG or arg.startswith(CLI_FLAG + "="):
+            argv.remove(arg)
+            report_path = arg.partition("=")[2] or DEFAULT_REPORT
+    env_value = os.environ.get(ENV_VAR, "")
+    if report_path is None and env_value and env_value != "0":
+        report_path = DEFAULT_REPORT if env_value == "1" else env_value
+    if report_path is None:
+        return None
+    return enable(report_path)
+
+
+def enable(report_path=DEFAULT_REPORT):
+    global _profiler
+    if _profiler is None:
+        _profiler = StartupProfiler(report_path)
+        _profiler.install_import_hook()
+    return _profiler
+
+
+def get_profiler():
+    return _profiler
+
+
+def span(name):
+    """Context manager timing `name` when profiling is enabled, a no-op otherwise."""
+    if _profiler is None:
+        return nullcontext()
+    return _profiler.span(name)
+
+
+def mark(name):
+    if _profiler is not None:
+        _profiler.mark(name)
+
+
+def watch_first_paint(widget, name):
+    if _profiler is not None:
+        _profiler.watch_first_paint(widget, name)
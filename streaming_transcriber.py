@@ -0,0 +1,99 @@
+import threading
+from audio_features import speech_bounds
+
+
+class StreamingTranscriber:
+    """Transcribes the utterance being recorded in overlapping windows.
+
+    While the user speaks, a background thread re-transcribes the audio since
+    the last committed point every ``step_s`` seconds and reports the running
+    hypothesis through ``on_partial``. Once the window grows past ``window_s``
+    every Whisper segment but the last is committed, so each pass stays short.
+    When silence is detected, ``finish`` reuses the last pass outright if
+    nothing was said since, and otherwise only re-decodes the uncommitted
+    window instead of the whole utterance.
+    """
+
+    def __init__(self, detector, window_s=10.0, step_s=1.0, min_audio_s=1.0, on_partial=None):
+        self.detector = detector
+        self.window_s = window_s
+        self.step_s = step_s
+        self.min_audio_s = min_audio_s
+        self.on_partial = on_partial
+        self.thread = None
+        self.stop_event = threading.Event()
+        self._reset_state()
+
+    def _reset_state(self):
+        self.committed_texts = []
+        self.committed_samples = 0      # offset into the utterance audio
+        self.hypothesis = ""            # text for audio after committed_samples
+        self.hypothesis_end = 0         # utterance offset the hypothesis covers up to
+
+    def start(self):
+        """Begin streaming passes for a freshly detected utterance."""
+        self.cancel()
+        self._reset_state()
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop_passes(self):
+        """Stop scheduling new passes without waiting for one in flight."""
+        self.stop_event.set()
+
+    def cancel(self):
+        """Stop the background passes without producing a result."""
+        self.stop_event.set()
+        if self.thread and self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join()
+        self.thread = None
+
+    def _run(self):
+        while not self.stop_event.wait(self.step_s):
+            try:
+                self._transcribe_pass(self.detector.get_audio_data())
+            except Exception as e:
+                print(f"Error in streaming transcription: {e}")
+
+    def _transcribe_pass(self, audio):
+        rate = self.detector.rate
+        window = audio[self.committed_samples:]
+        if len(window) < self.min_audio_s * rate:
+            return
+        result = self.detector.transcribe_window(window, prompt=" ".join(self.committed_texts))
+        segments = result.get("segments", [])
+
+        if len(window) > self.window_s * rate and len(segments) > 1:
+            # Commit settled segments; the last one may still be cut mid-word
+            settled = segments[:-1]
+            self.committed_texts.extend(seg["text"].strip() for seg in settled)
+            self.committed_samples += int(settled[-1]["end"] * rate)
+            self.hypothesis = segments[-1]["text"].strip()
+        else:
+            self.hypothesis = result["text"].strip()
+        self.hypothesis_end = len(audio)
+
+        if self.on_partial:
+            self.on_partial(self.text())
+
+    def text(self):
+        """Committed text followed by the current hypothesis."""
+        return " ".join(t for t in self.committed_texts + [self.hypothesis] if t)
+
+    def finish(self, audio):
+        """Stop streaming and return the final transcription of ``audio``."""
+        self.cancel()
+        tail = audio[self.hypothesis_end:]
+        tail_silent = speech_bounds(self.detector.frame_db(tail), self.detector.silence_threshold) is None
+        if self.hypothesis_end and tail_silent:
+            # Nothing was said after the last pass: its hypothesis is final
+            return self.text()
+
+        window = audio[self.committed_samples:]
+        if len(window) == 0:
+            return " ".join(self.committed_texts)
+        result = self.detector.transcribe_window(window, prompt=" ".join(self.committed_texts))
+        self.hypothesis = result["text"].strip()
+        self.hypothesis_end = len(audio)
+        return self.text()
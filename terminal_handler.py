@@ -1,11 +1,48 @@
+import asyncio
+import re
+import shlex
 import subprocess
+import concurrent.futures
+import locale
 import threading
 import queue
+import select
 import time
+from collections import deque
+from functools import partial
 import sys
 import os
+import shutil
 from enum import Enum, auto
 from output_types import OutputType
+from process_engine import get_process_engine, pump_lines, open_fd_reader
+
+if os.name != 'nt':
+    import pty
+    import fcntl
+    import termios
+
+# Echoed by cmd and PowerShell with the number of the last command they ran; see _with_end_marker
+MARKER_PREFIX = "__aidee_done_"
+MARKER = re.compile(r"(echo\s+)?" + MARKER_PREFIX + r"(\d*)__")
+# The PTY shell's PS1: it finished a command line and reads the next one
+PROMPT_MARKER = "__aidee_prompt__"
+# The PTY shell's PS2: it is waiting for the rest of a command (an unclosed quote or block)
+CONTINUATION_MARKER = "__aidee_more__"
+# /proc/<pid>/wchan of a process blocked reading its terminal
+TTY_READ_WCHANS = ("wait_woken", "n_tty_read")
+
+
+def _set_controlling_terminal():
+    """Run in the child after setsid(): make the PTY on stdin its controlling terminal."""
+    fcntl.ioctl(0, termios.TIOCSCTTY, 0)
+
+
+def _script_name(command):
+    """The script of a "python <script>" command; the path may be quoted."""
+    # Windows paths keep their backslashes; only the quotes are removed
+    parts = shlex.split(command, posix=os.name != 'nt')
+    return parts[1].strip('"') if os.name == 'nt' else parts[1]
 
 
 class OutputMessage:
@@ -14,16 +51,97 @@ class OutputMessage:
         self.content = content
         self.timestamp = timestamp or time.time()
 
+class OutputCoalescer:
+    """Drains an output queue in batches, for delivery to the GUI once per frame.
+
+    ``next_batch`` waits up to ``max_latency_ms`` for output, then keeps
+    collecting until that much time has passed since the first message or
+    ``max_lines`` messages are in the batch, so a chatty process produces
+    one signal per frame instead of one per line.
+    """
+
+    def __init__(self, output_queue, max_lines=500, max_latency_ms=16):
+        self.output_queue = output_queue
+        self.max_lines = max_lines
+        self.max_latency_s = max_latency_ms / 1000
+        self.lock = threading.Lock()
+        self.lines = 0
+        self.batches = 0
+        self.high_water = 0
+        self.recent = deque()  # (time, lines) of the batches of the last second
+
+    def put(self, message):
+        self.output_queue.put(message)
+        depth = self.output_queue.qsize()
+        if depth > self.high_water:
+            self.high_water = depth
+
+    def next_batch(self, timeout=None):
+        """Up to ``max_lines`` messages, or [] if nothing arrived within ``timeout`` (default max latency)."""
+        try:
+            batch = [self.output_queue.get(timeout=self.max_latency_s if timeout is None else timeout)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.max_latency_s
+        while len(batch) < self.max_lines:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.output_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        now = time.monotonic()
+        with self.lock:
+            self.lines += len(batch)
+            self.batches += 1
+            self.recent.append((now, len(batch)))
+            while self.recent and now - self.recent[0][0] > 1.0:
+                self.recent.popleft()
+        return batch
+
+    def stats(self):
+        with self.lock:
+            now = time.monotonic()
+            return {
+                "lines": self.lines,
+                "batches": self.batches,
+                "avg_batch": self.lines / self.batches if self.batches else 0.0,
+                "lines_per_sec": sum(n for t, n in self.recent if now - t <= 1.0),
+                "queue_depth": self.output_queue.qsize(),
+                "queue_high_water": self.high_water,
+            }
+
+
+
 class TerminalHandler:
-    def __init__(self, terminal_type="cmd", initial_cwd=None):
-        self.terminal_type = terminal_type
+    """A shell plus the scripts started from it, run on the shared process engine.
+
+    ``execute_command`` returns a concurrent.futures.Future that completes
+    when the command has finished, so callers can wait on it (or await it
+    with ``asyncio.wrap_future``) instead of sleeping. Output goes to
+    ``output_queue`` as before.
+    """
+
+    def __init__(self, terminal_type=None, initial_cwd=None, engine=None):
+        # "cmd" or "powershell" over pipes on Windows, "pty" (a shell on a pseudo-terminal) elsewhere
+        self.terminal_type = terminal_type or ("cmd" if os.name == 'nt' else "pty")
+        self.engine = engine or get_process_engine()
         self.process = None
-        self.stop_event = threading.Event()
-        self.command_thread = None
-        self.newline = "\n" if terminal_type == "cmd" else "`n"
-        self.command_queue = queue.Queue()
+        self.pty_master = None
+        self.encoding = "utf-8" if self.terminal_type == "pty" else locale.getpreferredencoding(False)
+        self.newline = "`n" if self.terminal_type == "powershell" else "\n"
+        self.commands = None  # asyncio.Queue of (command, future), lives on the engine loop
+        self.command_task = None
+        self.reader_tasks = []
+        self.shell_commands = deque()  # (number, future) of commands written to the shell, oldest first
+        self.shell_continuing = False  # the PTY shell is reading the rest of a multi-line command
+        self.shell_started = False  # the PTY shell printed its first prompt, which ends no command
+        self.markers = 0
         self.output_queue = queue.Queue()
-        self.current_process = None
+        self.output_coalescer = OutputCoalescer(self.output_queue)
+        self.script_tasks = {}  # task -> future; Python scripts run next to the shell, each as its own task
+        self.script_processes = set()
         self.commands_pending = 0
         self.commands_lock = threading.Lock()
         self.current_cwd = initial_cwd or os.getcwd()
@@ -32,123 +150,255 @@ class TerminalHandler:
             "(c) Microsoft Corporation. All rights reserved."
         ]
 
-    def _start_terminal(self):
+    async def _start_terminal(self):
         """Start the terminal process with appropriate settings."""
-        if self.terminal_type == "cmd":
-            command = ["cmd.exe", "/q"]
-        elif self.terminal_type == "powershell":
-            command = ["powershell.exe"]
+        if self.terminal_type == "pty":
+            readers = await self._start_pty_terminal()
         else:
-            raise ValueError("Unsupported terminal type")
-        
+            if self.terminal_type == "cmd":
+                command = ["cmd.exe", "/q"]
+            elif self.terminal_type == "powershell":
+                command = ["powershell.exe"]
+            else:
+                raise ValueError("Unsupported terminal type")
+            try:
+                self.process = await asyncio.create_subprocess_exec(
+                    *command,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if os.name == 'nt' else 0,
+                    cwd=self.current_cwd  # Set initial working directory
+                )
+            except Exception as e:
+                self._emit_error(f"Failed to start terminal: {e}")
+                raise
+            readers = [(self.process.stdout, OutputType.STDOUT), (self.process.stderr, OutputType.STDERR)]
+        self.reader_tasks = [
+            asyncio.create_task(pump_lines(reader, partial(self._on_shell_line, output_type), self.encoding))
+            for reader, output_type in readers
+        ]
+        asyncio.create_task(self._watch_shell(self.process))
+
+    async def _start_pty_terminal(self):
+        """Start a shell on a pseudo-terminal; returns its (reader, output type) list."""
+        if os.path.exists("/bin/bash"):
+            command = ["/bin/bash", "--noprofile", "--norc", "--noediting", "-i"]
+        else:
+            command = ["/bin/sh", "-i"]
+        master, slave = pty.openpty()
+        # Commands are already shown by the terminal widget: don't echo them back
+        attributes = termios.tcgetattr(slave)
+        attributes[3] &= ~termios.ECHO
+        termios.tcsetattr(slave, termios.TCSANOW, attributes)
+        # The prompts tell when the shell finished a command line and when it needs more input
+        env = dict(os.environ, TERM="dumb", PS1=f"{PROMPT_MARKER}\n", PS2=f"{CONTINUATION_MARKER}\n")
+        env.pop("PROMPT_COMMAND", None)
         try:
-            self.process = subprocess.Popen(
-                command,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=0,
-                universal_newlines=True,
-                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if os.name == 'nt' else 0,
-                cwd=self.current_cwd  # Set initial working directory
+            self.process = await asyncio.create_subprocess_exec(
+                *command,
+                stdin=slave,
+                stdout=slave,
+                stderr=slave,
+                start_new_session=True,
+                preexec_fn=_set_controlling_terminal,  # job control and Ctrl+C work as in a real terminal
+                env=env,
+                cwd=self.current_cwd
             )
         except Exception as e:
+            os.close(master)
             self._emit_error(f"Failed to start terminal: {e}")
             raise
-        
-        threading.Thread(target=self._read_process_output, 
-                        args=(self.process.stdout, OutputType.STDOUT),
-                        daemon=True).start()
-        threading.Thread(target=self._read_process_output, 
-                        args=(self.process.stderr, OutputType.STDERR),
-                        daemon=True).start()
+        finally:
+            os.close(slave)
+        self.pty_master = os.dup(master)  # for writing; the reader owns and closes `master`
+        return [(await open_fd_reader(master), OutputType.STDOUT)]
+
+    async def _watch_shell(self, process):
+        await process.wait()
+        # The shell exited (e.g. "exit"): its remaining commands won't print their end markers
+        self._finish_shell_commands(len(self.shell_commands), process.returncode)
+
+    def _on_line(self, output_type, line):
+        if line.strip():  # Only process non-empty lines
+            self._emit_output(output_type, line.rstrip())
+
+    def _on_shell_line(self, output_type, line):
+        """Shell output: prompts and end markers complete the commands sent to the shell.
+
+        Each PS1 prompt of the PTY shell completes the oldest command. An
+        end marker from cmd or PowerShell completes its command and every
+        one before it, since a command line that a program read as its
+        input never prints its marker.
+        """
+        if PROMPT_MARKER in line:
+            for _ in range(line.count(PROMPT_MARKER)):
+                self.shell_continuing = False
+                if not self.shell_started:
+                    self.shell_started = True
+                    continue
+                self._finish_shell_commands(min(1, len(self.shell_commands)))
+            line = line.replace(PROMPT_MARKER, "")
+        if MARKER_PREFIX in line:
+            for match in MARKER.finditer(line):
+                if match.group(2):
+                    number = int(match.group(2))
+                    self.shell_continuing = False
+                    self._finish_shell_commands(sum(1 for n, _ in self.shell_commands if n <= number))
+            line = MARKER.sub("", line)
+        if CONTINUATION_MARKER in line:
+            # The command is complete as far as we can tell; the next lines finish it
+            if not self.shell_continuing:
+                self.shell_continuing = True
+                self._emit_info("Command incomplete: waiting for more input")
+            self._finish_shell_commands(len(self.shell_commands))
+            line = line.replace(CONTINUATION_MARKER, "")
+        self._on_line(output_type, line)
+
+    def _finish_shell_commands(self, count, result=None):
+        for _ in range(count):
+            number, future = self.shell_commands.popleft()
+            self._finish(future, result)
+
+    async def _write_stdin(self, text):
+        if self.pty_master is not None:
+            os.write(self.pty_master, text.encode())
+        else:
+            self.process.stdin.write(text.encode(self.encoding))
+            await self.process.stdin.drain()
+
+    def _with_end_marker(self, command, number):
+        """The text to send for a shell command that completes when end marker ``number`` is seen.
+
+        The PTY shell's prompt marks the end of every command, so the line
+        is sent unchanged. cmd and PowerShell echo the marker from a line
+        of its own, so comments in the command can't hide it.
+        """
+        if self.terminal_type == "pty":
+            return command + self.newline
+        return f"{command}{self.newline}echo {MARKER_PREFIX}{number}__{self.newline}"
+
+    async def _reads_input(self):
+        """True if a line sent to the PTY shell now would be input rather than a new command.
+
+        That is while the shell reads the rest of a multi-line command, while
+        a program runs in the foreground, and while a builtin such as
+        ``read`` waits on the terminal before the running command's prompt.
+        """
+        if self.pty_master is None:
+            return False
+        if self.shell_continuing:
+            return True
+        # A prompt that is already written but not read yet must count first
+        for _ in range(10):
+            if not self.shell_commands or not select.select([self.pty_master], [], [], 0)[0]:
+                break
+            await asyncio.sleep(0.005)
+        if not self.shell_commands:
+            return False  # the shell is at its prompt
+        try:
+            if os.tcgetpgrp(self.pty_master) != self.process.pid:
+                return True
+            with open(f"/proc/{self.process.pid}/wchan") as f:
+                return f.read().strip() in TTY_READ_WCHANS
+        except OSError:
+            return False  # no /proc (macOS): a new command
 
     def _update_cwd(self, new_cwd):
         """Update the current working directory."""
         self.current_cwd = new_cwd
         self._emit_output(OutputType.CWD, new_cwd)
 
-    def _execute_python_script(self, script_name):
-        """Execute a Python script with unbuffered output."""
-        python_executable = "pythonw.exe" if os.name == 'nt' else "python"
-        
+    async def _execute_python_script(self, script_name):
+        """Execute a Python script with unbuffered output; returns its exit code.
+
+        On POSIX stdout is a PTY, so the script sees a terminal, and stderr a pipe.
+        Scripts don't go through the shell, so they start right away, next to
+        whatever the shell is running.
+        """
+        use_pty = self.terminal_type == "pty"
+        if use_pty:
+            python_executable = shutil.which("python") or sys.executable
+            master, slave = pty.openpty()
+            stdout = slave
+        else:
+            python_executable = "pythonw.exe" if os.name == 'nt' else "python"
+            stdout = asyncio.subprocess.PIPE
         try:
-            self.current_process = subprocess.Popen(
-                [python_executable, "-u", script_name],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=0,
-                universal_newlines=True,
+            process = await asyncio.create_subprocess_exec(
+                python_executable, "-u", script_name,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=stdout,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=use_pty,
                 cwd=self.current_cwd  # Use current working directory
             )
-            
-            out_thread = threading.Thread(target=self._read_process_output, 
-                                        args=(self.current_process.stdout, OutputType.STDOUT),
-                                        daemon=True)
-            err_thread = threading.Thread(target=self._read_process_output, 
-                                        args=(self.current_process.stderr, OutputType.STDERR),
-                                        daemon=True)
-            out_thread.start()
-            err_thread.start()
-            
-            self.current_process.wait()
-            
-            out_thread.join()
-            err_thread.join()
-            self.current_process = None
-            
         except Exception as e:
+            if use_pty:
+                os.close(master)
             self._emit_error(f"Error executing Python script {script_name}: {e}")
             raise
+        finally:
+            if use_pty:
+                os.close(slave)
+        self.script_processes.add(process)
+        try:
+            stdout_reader = await open_fd_reader(master) if use_pty else process.stdout
+            # Both readers reach end of file after the last line, so all output is delivered on return
+            await asyncio.gather(
+                pump_lines(stdout_reader, partial(self._on_line, OutputType.STDOUT), self.encoding),
+                pump_lines(process.stderr, partial(self._on_line, OutputType.STDERR), self.encoding),
+                process.wait()
+            )
+        finally:
+            self.script_processes.discard(process)
+        return process.returncode
 
-    def _execute_terminal_command(self, command):
-        """Execute a command directly in the terminal."""
+    async def _run_script(self, command, future):
         try:
-            # Handle CD commands specially to track directory changes
-            if command.lower().startswith('cd '):
-                new_path = command[3:].strip().strip('"').strip("'")
-                if new_path:
-                    try:
-                        # Handle relative or absolute paths
-                        if os.path.isabs(new_path):
-                            new_cwd = new_path
-                        else:
-                            new_cwd = os.path.abspath(os.path.join(self.current_cwd, new_path))
-                        
-                        if os.path.exists(new_cwd):
-                            self._update_cwd(new_cwd)
-                        else:
-                            self._emit_error(f"Directory not found: {new_path}")
-                    except Exception as e:
-                        self._emit_error(f"Error changing directory: {e}")
-
-            command_with_newline = command + self.newline
-            self.process.stdin.write(command_with_newline)
-            self.process.stdin.flush()
-            
-            time.sleep(0.1)
+            self._finish(future, await self._execute_python_script(_script_name(command)))
         except Exception as e:
-            self._emit_error(f"Error executing command '{command}': {e}")
-            raise
+            self._emit_error(f"Command execution failed: {e}")
+            self._finish(future, None, e)
+
+    async def _execute_terminal_command(self, command, future):
+        """Execute a command in the terminal; ``future`` completes when the shell prints its end marker."""
+        if await self._reads_input():
+            # The rest of a multi-line command, or input for a running program or builtin
+            await self._write_stdin(command + self.newline)
+            self._finish(future, None)
+            return
+
+        # Handle CD commands specially to track directory changes
+        if command.lower().startswith('cd '):
+            new_path = command[3:].strip().strip('"').strip("'")
+            if new_path:
+                try:
+                    # Handle relative or absolute paths
+                    if os.path.isabs(new_path):
+                        new_cwd = new_path
+                    else:
+                        new_cwd = os.path.abspath(os.path.join(self.current_cwd, new_path))
+
+                    if os.path.exists(new_cwd):
+                        self._update_cwd(new_cwd)
+                    else:
+                        self._emit_error(f"Directory not found: {new_path}")
+                except Exception as e:
+                    self._emit_error(f"Error changing directory: {e}")
 
-    def _read_process_output(self, stream, output_type: OutputType):
-        """Read output from a process stream and put it in the output queue."""
+        self.markers += 1
         try:
-            while True:
-                line = stream.readline()
-                if not line:
-                    break
-                if line.strip():  # Only process non-empty lines
-                    self._emit_output(output_type, line.strip())
-        except (ValueError, IOError) as e:
-            self._emit_error(f"Error reading from {output_type.name}: {e}")
+            await self._write_stdin(self._with_end_marker(command, self.markers))
+        except Exception as e:
+            self._emit_error(f"Error executing command '{command}': {e}")
+            raise
+        self.shell_commands.append((self.markers, future))
 
     def _emit_output(self, type: OutputType, content: str):
         """Put an output message in the queue, filtering out unwanted messages."""
         if not self._should_filter_message(content):
-            self.output_queue.put(OutputMessage(type, content))
+            self.output_coalescer.put(OutputMessage(type, content))
 
     def _emit_error(self, message: str):
         """Emit an error message."""
@@ -165,101 +415,122 @@ class TerminalHandler:
     def _should_filter_message(self, content: str) -> bool:
         """Check if a message should be filtered out."""
         return any(filtered in content for filtered in self.filtered_messages)
-    
-    def _command_worker(self):
-        """Worker thread that processes commands from the command queue."""
-        while not self.stop_event.is_set():
+
+    def _finish(self, future, result, error=None):
+        if future.done():
+            return
+        with self.commands_lock:
+            self.commands_pending -= 1
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    async def _command_loop(self):
+        """Send queued commands in order; waits on the queue instead of polling."""
+        while True:
+            command, future = await self.commands.get()
             try:
-                command = self.command_queue.get(timeout=0.1)
-                if command is None:
-                    break
-                
+                if command.startswith("python "):
+                    # Special handling for Python scripts: each runs as its own task
+                    task = asyncio.create_task(self._run_script(command, future))
+                    self.script_tasks[task] = future
+                    task.add_done_callback(lambda task: self.script_tasks.pop(task, None))
+                else:
+                    # Regular command execution: written right away, finished by its end marker
+                    await self._execute_terminal_command(command, future)
+            except asyncio.CancelledError:
+                self._finish(future, None, RuntimeError("Terminal stopped"))
+                raise
+            except Exception as e:
+                self._emit_error(f"Command execution failed: {e}")
+                self._finish(future, None, e)
+
+    async def _start(self):
+        self.commands = asyncio.Queue()
+        self.shell_commands.clear()
+        self.shell_continuing = False
+        self.shell_started = False
+        await self._start_terminal()
+        self.command_task = asyncio.create_task(self._command_loop())
+
+    async def _stop(self):
+        self.command_task.cancel()
+        # Stop the Python scripts still running
+        for script in list(self.script_processes):
+            if script.returncode is None:
                 try:
-                    # Special handling for Python scripts
-                    if command.startswith("python "):
-                        script_name = command.split()[1]
-                        self._execute_python_script(script_name)
-                    else:
-                        # Regular command execution
-                        self._execute_terminal_command(command)
-                        
+                    script.terminate()
+                    await asyncio.wait_for(script.wait(), 1)
                 except Exception as e:
-                    self._emit_error(f"Command execution failed: {e}")
-                
-                self.command_queue.task_done()
-                with self.commands_lock:
-                    self.commands_pending -= 1
-                    
-            except queue.Empty:
-                continue
+                    self._emit_error(f"Error stopping current process: {e}")
+        if self.script_tasks:
+            # Let them report their exit codes; a task that hadn't started yet is cancelled
+            await asyncio.wait(list(self.script_tasks), timeout=1)
+        for task, future in list(self.script_tasks.items()):
+            task.cancel()
+            self._finish(future, None, RuntimeError("Terminal stopped"))
+
+        process = self.process
+        try:
+            if process.returncode is None:
+                try:
+                    # Send exit command to the shell
+                    await self._write_stdin("exit" + self.newline)
+                    await asyncio.wait_for(process.wait(), 2)
+                except (asyncio.TimeoutError, OSError):
+                    if os.name == 'nt':
+                        process.send_signal(subprocess.CTRL_BREAK_EVENT)
+                    else:
+                        process.terminate()
+                    try:
+                        await asyncio.wait_for(process.wait(), 1)
+                    except asyncio.TimeoutError:
+                        process.kill()
+                        await process.wait()
+            # Deliver the shell's last output before returning
+            await asyncio.wait(self.reader_tasks, timeout=1)
+        finally:
+            if self.pty_master is not None:
+                os.close(self.pty_master)
+                self.pty_master = None
+            # Commands still queued will never run
+            while not self.commands.empty():
+                command, future = self.commands.get_nowait()
+                self._finish(future, None, RuntimeError("Terminal stopped"))
 
     def start(self):
-        """Start the terminal and command processing thread."""
+        """Start the terminal and its command loop on the process engine."""
         if self.process is not None:
             self.stop()
-        
-        self.stop_event.clear()
-        self._start_terminal()
-        
-        # Start command processing thread
-        self.command_thread = threading.Thread(
-            target=self._command_worker,
-            daemon=True
-        )
-        self.command_thread.start()
+        self.engine.submit(self._start()).result()
 
     def stop(self):
         """Stop the terminal and clean up resources."""
-        self.stop_event.set()
-        self.command_queue.put(None)
-        
-        # Stop current Python process if running
-        if self.current_process:
-            try:
-                self.current_process.terminate()
-                self.current_process.wait(timeout=1)
-            except Exception as e:
-                self._emit_error(f"Error stopping current process: {e}")
-        
-        if self.process:
-            try:
-                # Send exit command to CMD
-                self.process.stdin.write("exit" + self.newline)
-                self.process.stdin.flush()
-                
-                try:
-                    self.process.wait(timeout=2)
-                except subprocess.TimeoutExpired:
-                    if os.name == 'nt':
-                        self.process.send_signal(subprocess.CTRL_BREAK_EVENT)
-                    else:
-                        self.process.terminate()
-                    self.process.wait(timeout=1)
-                    
-                    if self.process.poll() is None:
-                        self.process.kill()
-                        self.process.wait()
-            
-            except Exception as e:
-                self._emit_error(f"Error stopping terminal: {e}")
-            
-            finally:
-                self.process = None
-                #self._emit_info("Terminal stopped")
-
-        # Wait for command thread to finish
-        if self.command_thread and self.command_thread.is_alive():
-            self.command_thread.join(timeout=1)
+        if self.process is None:
+            return
+        try:
+            self.engine.submit(self._stop()).result(timeout=5)
+        except Exception as e:
+            self._emit_error(f"Error stopping terminal: {e}")
+        finally:
+            self.process = None
+            #self._emit_info("Terminal stopped")
 
     def execute_command(self, command):
-        """Queue a command for execution in the terminal."""
-        if not self.process or self.process.poll() is not None:
+        """Queue a command for execution in the terminal.
+
+        Returns a concurrent.futures.Future that completes when the command
+        has finished (with the exit code for Python scripts).
+        """
+        if not self.process or self.process.returncode is not None:
             raise RuntimeError("Terminal is not running")
-        
+
+        future = concurrent.futures.Future()
         with self.commands_lock:
             self.commands_pending += 1
-        self.command_queue.put(command)
-        return True
+        self.engine.call_soon(self.commands.put_nowait, (command, future))
+        return future
 
     def has_pending_commands(self):
         """Check if there are any pending commands."""
@@ -274,6 +545,15 @@ class TerminalHandler:
         except queue.Empty:
             return None
 
+    def get_output_batch(self, timeout=None):
+        """Get the output produced in the next frame as a list of OutputMessage
+        objects (empty if there was none)."""
+        return self.output_coalescer.next_batch(timeout)
+
+    def output_stats(self):
+        """Output throughput counters: lines/sec and the queue high-water mark."""
+        return self.output_coalescer.stats()
+
 def run_test():
     # Create and start terminal handler
     terminal = TerminalHandler()
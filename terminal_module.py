@@ -9,6 +9,8 @@ from terminal_handler import TerminalHandler
 from enum import Enum, auto
 import threading
 from output_types import OutputType
+from terminal_scrollback import Scrollback, STYLES, STYLE_OUTPUT, STYLE_ERROR, STYLE_COMMAND
+from scrollback_view import ScrollbackView
 from copy import deepcopy
 class TerminalThemes:
     THEMES = {
@@ -57,14 +59,17 @@ class TerminalThemes:
 
 class Terminal(QWidget):
     output_received = pyqtSignal(str, str)  # (content, type)
+    output_batch_received = pyqtSignal(list)  # [(content, type), ...] produced within one frame
     cwd_changed = pyqtSignal(str)  # New signal for CWD updates
 
     def __init__(self, parent=None, initial_height=300, collapsed_height=50,
                  font_size=12, padding=5, border_radius=8, initial_history=None,
-                 shell_enabled=True, theme='Dark', initial_cwd=None):
+                 shell_enabled=True, theme='Dark', initial_cwd=None, scrollback_lines=10000,
+                 spill_scrollback=False):
         super().__init__(parent)
         self.history_lock = threading.Lock()
         self.output_received.connect(self.update_output)
+        self.output_batch_received.connect(self.update_output_batch)
         self.cwd_changed.connect(self.update_cwd)
         
         # Store configuration
@@ -87,7 +92,10 @@ class Terminal(QWidget):
         self.terminal_parser.start()
         # State variables
         self.is_expanded = True
-        self.history = initial_history if initial_history else []
+        # Last scrollback_lines lines of output; older ones go to a temp file if spill_scrollback
+        self.scrollback = Scrollback(scrollback_lines, spill=spill_scrollback)
+        self.last_match = None  # line number of the last search result
+        self.initial_history = initial_history or []
         self.cursor_visible = True
         
         # Setup cursor blink timer
@@ -140,6 +148,22 @@ class Terminal(QWidget):
         terminal_text.setFont(QFont("Consolas", self.config['font_size']))
         header_layout.addWidget(terminal_text)
 
+        # Search in the output, older spilled lines included
+        self.search_field = QLineEdit()
+        self.search_field.setPlaceholderText("Search output")
+        self.search_field.setMaximumWidth(200)
+        self.search_field.setStyleSheet(f"""
+                QLineEdit {{
+                color: {self.config['text_color']};
+                background-color: {self.config['background_color']};
+                border: 1px solid {self.config['border_color']};
+                border-radius: 4px;
+                padding: 2px 6px;
+                }}
+        """)
+        self.search_field.returnPressed.connect(lambda: self.find_in_output(self.search_field.text()))
+        header_layout.addWidget(self.search_field)
+
         # Toggle button
         self.toggle_btn = QPushButton("▲")
         self.toggle_btn.clicked.connect(self.toggle_terminal)
@@ -188,31 +212,23 @@ class Terminal(QWidget):
         """)
         input_layout.addWidget(self.input_field)
         
-        content_layout.addWidget(self.input_container)
-        
         # Scroll area for output
         self.scroll_area = QScrollArea()
         self.scroll_area.setWidgetResizable(True)
         
-        # Output text edit with terminal-like styling
-        self.output_text_edit = QTextEdit()
-        self.output_text_edit.setReadOnly(True)
-        self.output_text_edit.setFont(QFont("Consolas", self.config['font_size']))
-        self.output_text_edit.setWordWrapMode(QTextOption.WrapAnywhere)
-        self.output_text_edit.setStyleSheet(f"""
-            QTextEdit {{
-                background-color: {self.config['background_color']};
-                color: {self.config['text_color']};
-                border: none;
-                padding: 12px;
-            }}
-        """)
+        # Output view: paints only the visible lines of the scrollback
+        self.output_view = ScrollbackView(self.scrollback)
+        output_font = QFont("Consolas", self.config['font_size'])
+        output_font.setStyleHint(QFont.Monospace)
+        self.output_view.setFont(output_font)
         
         # Imposta il size policy per espandersi orizzontalmente
-        self.output_text_edit.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.output_view.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         
-        self.scroll_area.setWidget(self.output_text_edit)
+        self.scroll_area.setWidget(self.output_view)
         content_layout.addWidget(self.scroll_area)
+        # Output reads top to bottom, so the prompt sits below it like in a shell
+        content_layout.addWidget(self.input_container)
         
         self.main_layout.addWidget(self.terminal_content)
         
@@ -227,6 +243,8 @@ class Terminal(QWidget):
             self.input_field.returnPressed.connect(self.start_handle_command_thread)
         
         # Display initial history
+        self.load_history(self.initial_history)
+        self.initial_history = None
         self.display_history()
         
         # Set focus to input field
@@ -317,17 +335,11 @@ class Terminal(QWidget):
             }}
         """)
         
-        # Update output text edit style
-        self.output_text_edit.setStyleSheet(f"""
-            QTextEdit {{
-                color: {self.config['text_color']};
-                background-color: {self.config['background_color']};
-                padding: 4px 13px 4px 13px;
-                border: 0;
-                
-                
-            }}
-        """)
+        # Update output view colors
+        self.output_view.set_colors(self.config['text_color'], self.config['error_color'],
+                                    self.config['prompt_color'], self.config['background_color'],
+                                    self.config['selection_color'])
+        self.output_view.setStyleSheet("border: 0;")
 
     def toggle_cursor(self):
         """Toggle the cursor visibility for the blinking effect"""
@@ -366,22 +378,25 @@ class Terminal(QWidget):
                 
                 try:
                         self.terminal_parser.execute_command(command)
-                        while self.terminal_parser.has_pending_commands():
-                                message = self.terminal_parser.get_output()
-                                if message:  # Check message first
-                                        print(f"Type: {message.type}, Message: {message.content}")
+                        while True:
+                                # One signal per frame, however many lines the command printed
+                                messages = self.terminal_parser.get_output_batch()
+                                if not messages and not self.terminal_parser.has_pending_commands():
+                                        break
+                                batch = []
+                                for message in messages:
                                         if message.type == OutputType.CWD:
                                                 self.cwd_changed.emit(message.content)
-                                        elif message.type == OutputType.ERROR:
-                                                self.output_received.emit(message.content, "error")
-                                        elif message.type == OutputType.STDERR:
-                                                self.output_received.emit(message.content, "error")
+                                        elif message.type in (OutputType.ERROR, OutputType.STDERR):
+                                                batch.append((message.content, "error"))
                                         elif message.type == OutputType.INFO:
-                                                print(f"\033[92m[INFO] {message.content}\033[0m")
+                                                batch.append((message.content, "output"))
                                         elif message.type == OutputType.STDOUT:
-                                                self.output_received.emit(message.content, "output")
+                                                batch.append((message.content, "output"))
                                         else :
-                                                self.output_received.emit("Type not recognized", "error")
+                                                batch.append(("Type not recognized", "error"))
+                                if batch:
+                                        self.output_batch_received.emit(batch)
                                         
                 except Exception as e:
                         self.output_received.emit(str(e), "error")
@@ -391,17 +406,11 @@ class Terminal(QWidget):
         """Start a new thread to handle the command"""
         command = self.input_field.text().strip()
         self.input_field.clear()
-        
+        self.run_command(command)
+
+    def run_command(self, command):
+        """Run a command as if it was typed in the input field"""
         if command:
-            with self.history_lock:
-                # Create a command group in history to keep command and its output together
-                command_group = {
-                    "type": "command_group",
-                    "command": command,
-                    "outputs": []
-                }
-                self.history.insert(0, command_group)
-            
             # Use signal to update UI from main thread
             self.output_received.emit(command, "command")
             
@@ -414,68 +423,76 @@ class Terminal(QWidget):
 
     def add_to_history(self, entry_type, content, details=None):
         """Thread-safe method to add entries to history"""
+        if entry_type == "command":
+            content = f"{self.current_cwd}> {content}"
+        elif entry_type == "output":
+            content = content.removeprefix(f"{self.last_cwd}>")
+        elif entry_type != "error":
+            return
         with self.history_lock:
-            if entry_type == "command":
-                return
-                
-            if self.history and isinstance(self.history[0], dict) and "outputs" in self.history[0]:
-                self.history[0]["outputs"].append({
-                    "type": entry_type,
-                    "content": content,
-                    "details": details if details else None
-                })
+            self.scrollback.append(content, STYLES[entry_type])
+
+    def load_history(self, entries):
+        """Add history entries in the old dict format (command groups and outputs)"""
+        for entry in entries:
+            if not isinstance(entry, dict) or "type" not in entry:
+                continue
+            if entry["type"] == "command_group":
+                with self.history_lock:
+                    self.scrollback.append(f"{entry.get('cwd', self.current_cwd)}> {entry['command']}", STYLE_COMMAND)
+                for output in entry["outputs"]:
+                    self.add_to_history(output["type"], output["content"])
             else:
-                entry = {
-                    "type": entry_type,
-                    "content": content,
-                    "details": details if details else None
-                }
-                self.history.insert(0, entry)
+                self.add_to_history(entry["type"], entry["content"])
 
     def display_history(self):
-        """Update the terminal display with current history"""
-        output_content = ""
-        
-        # Make a thread-safe copy of history for display
-        with self.history_lock:
-            history_copy = self.history.copy()
-        
-        for entry in history_copy:
-            if isinstance(entry, dict) and "type" in entry:
-                if entry["type"] == "command_group":
-                    # Display command first
-                    output_content +=f'<span style="color: {self.config["prompt_color"]}"><a style="color:{self.config['prompt_color']}" href="{self.current_cwd}">{self.current_cwd}</a>> {entry["command"]}</span>'
-                    # Then display all its outputs
-                    for output in entry["outputs"]:
-                        if output["type"] == "output":
-                            output_content += f'<div style="margin: 4px 0px; white-space: pre-wrap; ">{output["content"].removeprefix(f"{self.last_cwd}>")}</div><br>'
-                        elif output["type"] == "error":
-                            output_content += f'<br><span style="color: {self.config["error_color"]}">{output["content"]}</span><br>'
-                
-                elif entry["type"] == "output":
-                    output_content += f'<div style="margin: 4px 0px; white-space: pre-wrap; ">{entry["content"]}</div>'
-                elif entry["type"] == "error":
-                    output_content += f'<br><span style="color: {self.config["error_color"]}">{entry["content"]}</span><br>'
-
-        self.output_text_edit.setHtml(output_content)
-        
+        """Bring the output view up to date with the scrollback"""
+        self.output_view.refresh()
 
     @pyqtSlot(str, str)
     def update_output(self, content, output_type):
         """Update the terminal output (runs in main thread)"""
         if output_type == "clear":
-            with self.history_lock:
-                self.history = []
-            self.display_history()
-        else:
+            self.clear_history()
+            return
+        self.add_to_history(output_type, content)
+        self.display_history()
+
+    @pyqtSlot(list)
+    def update_output_batch(self, batch):
+        """Append a batch of (content, type) output entries with a single repaint"""
+        for content, output_type in batch:
             self.add_to_history(output_type, content)
-            self.display_history()
+        self.display_history()
 
     def clear_history(self):
         """Thread-safe method to clear history"""
         with self.history_lock:
-            self.history = []
-        self.display_history()
+            self.scrollback.clear()
+        self.last_match = None
+        self.output_view.clear_selection()
+        self.output_view.refresh(follow=True)
+
+    def search_output(self, pattern, regex=False):
+        """All (line number, text) output lines matching pattern, spilled ones included"""
+        with self.history_lock:
+            return list(self.scrollback.search(pattern, regex=regex))
+
+    def find_in_output(self, pattern):
+        """Select the next in-memory line matching pattern, wrapping around"""
+        if not pattern:
+            return
+        matches = self.search_output(pattern)
+        visible = [number for number, _ in matches if number >= self.scrollback.first]
+        spilled = len(matches) - len(visible)
+        self.search_field.setToolTip(f"{len(visible)} matches"
+                                     + (f", {spilled} more in older output" if spilled else ""))
+        if not visible:
+            return
+        later = [number for number in visible if self.last_match is None or number > self.last_match]
+        self.last_match = later[0] if later else visible[0]
+        self.output_view.select_lines(self.last_match, self.last_match)
+        self.output_view.scroll_to_line(self.last_match)
 
     def set_prompt(self, prompt_text):
         """Change the terminal prompt"""
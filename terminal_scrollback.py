@@ -0,0 +1,94 @@
+import re
+import tempfile
+
+# Style ids stored per line; the view maps them to theme colors
+STYLE_OUTPUT = 0
+STYLE_ERROR = 1
+STYLE_COMMAND = 2
+STYLES = {"output": STYLE_OUTPUT, "error": STYLE_ERROR, "command": STYLE_COMMAND}
+
+
+class Scrollback:
+    """Ring of the last ``max_lines`` terminal lines: text plus a one-byte style id per line.
+
+    Lines are numbered from the start of the session (or the last clear);
+    ``first`` is the oldest one still in memory. With ``spill=True`` lines
+    pushed out of the ring are appended to an anonymous temp file instead
+    of being dropped, and ``search`` covers them as well.
+    """
+
+    def __init__(self, max_lines=10000, spill=False):
+        self.max_lines = max(1, max_lines)
+        self.texts = [""] * self.max_lines
+        self.styles = bytearray(self.max_lines)
+        self.total = 0
+        self.max_length = 0  # longest line seen, for the view's horizontal scroll range
+        self.spill_file = tempfile.TemporaryFile("w+", encoding="utf-8") if spill else None
+        self.spilled = 0
+
+    @property
+    def first(self):
+        return max(0, self.total - self.max_lines)
+
+    def __len__(self):
+        return self.total - self.first
+
+    def append(self, text, style=STYLE_OUTPUT):
+        """Add text (split on newlines) at the end, evicting the oldest lines when full."""
+        for line in text.split("\n"):
+            slot = self.total % self.max_lines
+            if self.total >= self.max_lines:
+                self._spill(self.texts[slot], self.styles[slot])
+            self.texts[slot] = line
+            self.styles[slot] = style
+            self.total += 1
+            if len(line) > self.max_length:
+                self.max_length = len(line)
+
+    def _spill(self, text, style):
+        if self.spill_file is None:
+            return
+        self.spill_file.seek(0, 2)
+        self.spill_file.write(f"{style}\t{text}\n")
+        self.spilled += 1
+
+    def lines(self, start, count):
+        """(text, style) of up to ``count`` in-memory lines from line number ``start``."""
+        start = max(start, self.first)
+        end = min(start + count, self.total)
+        return [(self.texts[i % self.max_lines], self.styles[i % self.max_lines]) for i in range(start, end)]
+
+    def text(self, start, end):
+        """In-memory lines ``start`` to ``end`` (exclusive) joined with newlines."""
+        return "\n".join(text for text, _ in self.lines(start, end - start))
+
+    def search(self, pattern, regex=False, case_sensitive=False):
+        """Yield (line number, text) of every matching line, spilled lines first."""
+        flags = 0 if case_sensitive else re.IGNORECASE
+        matcher = re.compile(pattern if regex else re.escape(pattern), flags)
+        if self.spill_file is not None:
+            self.spill_file.flush()
+            self.spill_file.seek(0)
+            for number, row in enumerate(self.spill_file):
+                text = row.rstrip("\n").partition("\t")[2]
+                if matcher.search(text):
+                    yield number, text
+        for number in range(self.first, self.total):
+            text = self.texts[number % self.max_lines]
+            if matcher.search(text):
+                yield number, text
+
+    def clear(self):
+        self.texts = [""] * self.max_lines
+        self.styles = bytearray(self.max_lines)
+        self.total = 0
+        self.max_length = 0
+        if self.spill_file is not None:
+            self.spill_file.seek(0)
+            self.spill_file.truncate()
+        self.spilled = 0
+
+    def close(self):
+        if self.spill_file is not None:
+            self.spill_file.close()
+            self.spill_file = None
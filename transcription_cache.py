@@ -0,0 +1,173 @@
+import os
+import json
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "aidee", "transcriptions")
+
+
+def cache_key(audio, **options):
+    """Content address of a transcription: hash of the PCM and of everything that affects the text."""
+    digest = hashlib.sha256()
+    audio = np.ascontiguousarray(audio)
+    digest.update(str(audio.dtype).encode())
+    digest.update(audio.tobytes())
+    digest.update(json.dumps(options, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+class TranscriptionCache:
+    """In-memory LRU of transcription results, optionally backed by an on-disk store.
+
+    The disk store (``cache_dir``, e.g. DEFAULT_CACHE_DIR) is opt-in: it
+    keeps dictated text on disk and only pays off when the same audio is
+    transcribed again across runs (replays, benchmarks). Entries are JSON
+    files named after their key. The store is capped at ``max_disk_bytes``;
+    once over, the least recently used files are removed down to 90% of the
+    cap, so the sort happens rarely (hits refresh a file's modification time).
+    """
+
+    def __init__(self, cache_dir=None, max_entries=256, max_disk_bytes=32 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._disk_index = None  # key -> (size, last used), scanned on first use
+        self._disk_bytes = 0
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _scan_disk(self):
+        if self._disk_index is not None:
+            return
+        self._disk_index = {}
+        self._disk_bytes = 0
+        if not os.path.isdir(self.cache_dir):
+            return
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    info = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                self._disk_index[name[:-5]] = (info.st_size, info.st_mtime)
+                self._disk_bytes += info.st_size
+
+    def get(self, key):
+        """The cached result for ``key``, or None."""
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return self.memory[key]
+            value = self._read_disk(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, value)
+            return value
+
+    def put(self, key, value):
+        """Store a JSON-serializable result (plain text or a Whisper result dict)."""
+        with self.lock:
+            self._remember(key, value)
+            self._write_disk(key, value)
+
+    def _remember(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        if self.cache_dir is None:
+            return None
+        self._scan_disk()
+        if key not in self._disk_index:
+            return None
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                value = json.load(f)["value"]
+            now = time.time()
+            os.utime(path, (now, now))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Dropping unreadable transcription cache entry {path}: {e}")
+            self._remove(key)
+            return None
+        self._disk_index[key] = (self._disk_index[key][0], now)
+        return value
+
+    def _write_disk(self, key, value):
+        if self.cache_dir is None:
+            return
+        self._scan_disk()
+        path = self._path(key)
+        data = json.dumps({"value": value}).encode()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not write transcription cache entry {path}: {e}")
+            return
+        previous_size = self._disk_index.get(key, (0, 0))[0]
+        self._disk_index[key] = (len(data), time.time())
+        self._disk_bytes += len(data) - previous_size
+        self._evict()
+
+    def _evict(self):
+        if self._disk_bytes <= self.max_disk_bytes:
+            return
+        low_water = self.max_disk_bytes * 0.9
+        for key, _ in sorted(self._disk_index.items(), key=lambda item: item[1][1]):
+            if self._disk_bytes <= low_water:
+                break
+            self._remove(key)
+            self.evictions += 1
+
+    def _remove(self, key):
+        size, _ = self._disk_index.pop(key, (0, 0))
+        self._disk_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            if self.cache_dir is not None:
+                self._scan_disk()
+                for key in list(self._disk_index):
+                    self._remove(key)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "memory_entries": len(self.memory),
+                "disk_entries": len(self._disk_index) if self._disk_index is not None else None,
+                "disk_bytes": self._disk_bytes if self._disk_index is not None else None,
+                "evictions": self.evictions,
+            }
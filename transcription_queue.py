@@ -0,0 +1,165 @@
+import itertools
+import queue
+import threading
+import time
+
+
+class TranscriptionJob:
+    def __init__(self, job_id, audio, finalize=None, generation=0):
+        self.job_id = job_id
+        self.audio = audio
+        self.finalize = finalize  # optional per-job callable(audio) -> text
+        self.generation = generation
+        self.submitted_at = time.time()
+
+
+class TranscriptionWorkerPool:
+    """Bounded job queue with worker threads in front of the Whisper model.
+
+    The capture thread only enqueues finished utterances, so wake-word
+    listening keeps running while earlier utterances are transcribed. Results
+    are handed to ``on_result(job_id, text, error)`` strictly in submission
+    order, even when several workers finish out of order.
+    """
+
+    def __init__(self, transcribe, on_result, max_pending=4, workers=1):
+        self.transcribe = transcribe
+        self.on_result = on_result
+        self.max_pending = max_pending
+        self.workers = workers
+        self.jobs = queue.Queue(maxsize=max_pending)
+        self.threads = []
+        self.running = False
+        self.generation = 0  # bumped on stop so late results from old jobs are dropped
+        self._ids = itertools.count(1)
+        self._next_delivery = 1
+        self._finished = {}  # job_id -> (text, error), waiting for earlier jobs
+        self._outstanding = 0  # job ids handed out but not yet delivered
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.high_water = 0
+        self.blocked_s = 0.0
+        self.in_flight = 0
+
+    def start(self):
+        """Start the worker threads if they are not already running."""
+        if self.running:
+            return
+        self.running = True
+        self.threads = [threading.Thread(target=self._worker, args=(self.jobs, self.generation), daemon=True)
+                        for _ in range(self.workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self, wait=False):
+        """Stop the workers and drop queued jobs; in-flight results are discarded."""
+        with self._lock:
+            self.running = False
+            self.generation += 1
+            # Old workers keep their own queue, so a late one can't steal new jobs
+            old_jobs, self.jobs = self.jobs, queue.Queue(maxsize=self.max_pending)
+            self._finished.clear()
+            self._next_delivery = next(self._ids)
+            self._ids = itertools.count(self._next_delivery)
+            self._outstanding = 0
+            self._idle.notify_all()
+        while True:
+            try:
+                old_jobs.get_nowait()
+            except queue.Empty:
+                break
+        for _ in self.threads:
+            old_jobs.put(None)
+        if wait:
+            for thread in self.threads:
+                thread.join()
+        self.threads = []
+
+    def submit(self, audio, finalize=None, block=False, timeout=None):
+        """Queue an utterance and return its job id.
+
+        Raises ``queue.Full`` when the queue stays full (backpressure); the
+        rejection is counted and still delivered, in order, as an error.
+        """
+        with self._lock:
+            job = TranscriptionJob(next(self._ids), audio, finalize, self.generation)
+            self._outstanding += 1
+        started = time.perf_counter()
+        try:
+            self.jobs.put(job, block=block, timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+                self._finished[job.job_id] = (None, "Transcription queue full")
+                self._deliver_ready()
+            raise
+        finally:
+            with self._lock:
+                self.blocked_s += time.perf_counter() - started
+        with self._lock:
+            self.submitted += 1
+            self.high_water = max(self.high_water, self.jobs.qsize())
+        return job.job_id
+
+    def _worker(self, jobs, generation):
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            with self._lock:
+                self.in_flight += 1
+            text, error = None, None
+            try:
+                finalize = job.finalize or self.transcribe
+                text = finalize(job.audio)
+            except Exception as e:
+                error = str(e)
+            with self._lock:
+                self.in_flight -= 1
+                if job.generation != self.generation:
+                    continue
+                if error is None:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                self._finished[job.job_id] = (text, error)
+                self._deliver_ready()
+
+    def _deliver_ready(self):
+        # Called with self._lock held
+        while self._next_delivery in self._finished:
+            job_id = self._next_delivery
+            text, error = self._finished.pop(job_id)
+            self._next_delivery += 1
+            self._outstanding -= 1
+            try:
+                self.on_result(job_id, text, error)
+            except Exception as e:
+                print(f"Error delivering transcription {job_id}: {e}")
+        if self._outstanding == 0:
+            self._idle.notify_all()
+
+    def drain(self, timeout=None):
+        """Block until every submitted job has been delivered."""
+        with self._lock:
+            return self._idle.wait_for(lambda: self._outstanding == 0, timeout=timeout)
+
+    def metrics(self):
+        """Snapshot of queue depth and backpressure counters."""
+        with self._lock:
+            return {
+                "depth": self.jobs.qsize(),
+                "max_pending": self.max_pending,
+                "high_water": self.high_water,
+                "in_flight": self.in_flight,
+                "outstanding": self._outstanding,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "blocked_s": self.blocked_s,
+            }
@@ -0,0 +1,175 @@
+import os
+import numpy as np
+from audio_features import rms_db, to_float
+
+
+class VADBackend:
+    """Decides, chunk by chunk, whether the user is still speaking.
+
+    ``is_speech`` is called on every chunk while an utterance is recorded;
+    ``observe_idle`` on every chunk while waiting for the wake word, so
+    backends can learn the room before the user starts talking.
+    """
+
+    name = "base"
+
+    def load(self):
+        """Load any model the backend needs; called off the GUI thread."""
+
+    def reset(self):
+        """Forget per-utterance state."""
+
+    def observe_idle(self, chunk, level_db=None):
+        """See a chunk recorded while no utterance is active."""
+
+    def is_speech(self, chunk, level_db=None):
+        raise NotImplementedError
+
+
+class RMSVAD(VADBackend):
+    """Fixed dB threshold on the chunk RMS level (the original detector)."""
+
+    name = "rms"
+
+    def __init__(self, threshold_db=-50):
+        self.threshold_db = threshold_db
+
+    def is_speech(self, chunk, level_db=None):
+        if level_db is None:
+            level_db = rms_db(chunk)
+        return level_db >= self.threshold_db
+
+
+class AdaptiveNoiseFloorVAD(VADBackend):
+    """Speech is anything ``margin_db`` above a tracked noise floor.
+
+    The floor drops immediately to quieter chunks and rises slowly otherwise,
+    so it follows a noisy room without climbing onto sustained speech.
+    """
+
+    name = "adaptive"
+
+    def __init__(self, margin_db=10.0, min_speech_db=-65.0, initial_floor_db=-60.0,
+                 rise_db_per_chunk=0.05, idle_rise_db_per_chunk=0.5):
+        self.margin_db = margin_db
+        self.min_speech_db = min_speech_db
+        self.initial_floor_db = initial_floor_db
+        self.rise_db_per_chunk = rise_db_per_chunk
+        self.idle_rise_db_per_chunk = idle_rise_db_per_chunk
+        self.noise_floor_db = initial_floor_db
+
+    def _track(self, level_db, rise):
+        if level_db < self.noise_floor_db:
+            self.noise_floor_db = level_db
+        else:
+            self.noise_floor_db = min(level_db, self.noise_floor_db + rise)
+
+    def observe_idle(self, chunk, level_db=None):
+        if level_db is None:
+            level_db = rms_db(chunk)
+        # Idle audio is mostly room noise, so the floor may follow it faster
+        self._track(level_db, self.idle_rise_db_per_chunk)
+
+    def is_speech(self, chunk, level_db=None):
+        if level_db is None:
+            level_db = rms_db(chunk)
+        speech = level_db >= max(self.noise_floor_db + self.margin_db, self.min_speech_db)
+        if not speech:
+            self._track(level_db, self.rise_db_per_chunk)
+        return speech
+
+
+class OnnxVAD(VADBackend):
+    """Silero-style ONNX VAD run through onnxruntime, like openWakeWord.
+
+    The model scores fixed 512-sample windows (at 16 kHz); samples left over
+    from one chunk are carried into the next. Both the v4 (``h``/``c``) and
+    v5 (``state``) recurrent state layouts are supported. Without a
+    ``model_path`` it uses the silero_vad.onnx that openWakeWord keeps in
+    its resources/models directory.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_path=None, threshold=0.5, rate=16000, window_samples=512):
+        self.model_path = model_path
+        self.threshold = threshold
+        self.rate = rate
+        self.window_samples = window_samples
+        self.session = None
+        self.reset()
+
+    def load(self):
+        if self.session is not None:
+            return
+        if self.model_path is None:
+            import openwakeword
+            path = os.path.join(os.path.dirname(openwakeword.__file__), "resources", "models", "silero_vad.onnx")
+            if not os.path.isfile(path):
+                raise FileNotFoundError(f"ONNX VAD model not found: {path} "
+                                        "(openwakeword.utils.download_models() fetches it)")
+            self.model_path = path
+        if not os.path.isfile(self.model_path):
+            raise FileNotFoundError(f"ONNX VAD model not found: {self.model_path}")
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        # One small model per chunk: extra threads only add scheduling overhead
+        options.inter_op_num_threads = 1
+        options.intra_op_num_threads = 1
+        self.session = ort.InferenceSession(self.model_path, sess_options=options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.reset()
+
+    def reset(self):
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.state = np.zeros((2, 1, 128), dtype=np.float32)
+        self.h = np.zeros((2, 1, 64), dtype=np.float32)
+        self.c = np.zeros((2, 1, 64), dtype=np.float32)
+        self.context = np.zeros(64, dtype=np.float32)
+        self.last_probability = 0.0
+
+    def _score(self, window):
+        inputs = {"input": window[np.newaxis, :], "sr": np.array(self.rate, dtype=np.int64)}
+        if "state" in self.input_names:
+            # v5 models expect the previous window's last 64 samples prepended
+            inputs["input"] = np.concatenate([self.context, window])[np.newaxis, :]
+            self.context = window[-len(self.context):]
+            inputs["state"] = self.state
+            probability, self.state = self.session.run(None, inputs)
+        else:
+            inputs["h"], inputs["c"] = self.h, self.c
+            probability, self.h, self.c = self.session.run(None, inputs)
+        return float(np.asarray(probability).ravel()[0])
+
+    def is_speech(self, chunk, level_db=None):
+        if self.session is None:
+            self.load()
+        audio = np.concatenate([self.pending, to_float(chunk).astype(np.float32, copy=False)])
+        n_windows = len(audio) // self.window_samples
+        if n_windows == 0:
+            self.pending = audio
+            return self.last_probability >= self.threshold
+        scores = [self._score(audio[i * self.window_samples:(i + 1) * self.window_samples])
+                  for i in range(n_windows)]
+        self.pending = audio[n_windows * self.window_samples:]
+        self.last_probability = max(scores)
+        return self.last_probability >= self.threshold
+
+
+VAD_BACKENDS = {
+    RMSVAD.name: RMSVAD,
+    AdaptiveNoiseFloorVAD.name: AdaptiveNoiseFloorVAD,
+    OnnxVAD.name: OnnxVAD,
+}
+
+
+def create_vad(vad="rms", threshold_db=-50, **kwargs):
+    """Build a VAD backend from its name; backend instances are returned as-is."""
+    if isinstance(vad, VADBackend):
+        return vad
+    if vad not in VAD_BACKENDS:
+        raise ValueError(f"Unknown VAD backend '{vad}', expected one of {sorted(VAD_BACKENDS)}")
+    if vad == RMSVAD.name:
+        kwargs.setdefault("threshold_db", threshold_db)
+    return VAD_BACKENDS[vad](**kwargs)
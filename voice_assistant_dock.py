@@ -2,16 +2,33 @@ from PyQt5.QtWidgets import (
     QDockWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QSpacerItem, QSizePolicy, QWidget, QScrollArea, QApplication
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, pyqtSignal, QTimer
 from neumorphic_widgets import NeumorphicWidget, NeumorphicTextEdit
 from animated_wave_background import AnimatedWaveBackground
 from animated_circle_button import AnimatedCircleButton
+from process_memory import rss_bytes, format_bytes
+
+
+def keyword_display_name(keyword):
+    """"hey_jarvis_v0.1" -> "Hey Jarvis"."""
+    return keyword.rsplit("_v", 1)[0].replace("_", " ").title()
 class VoiceAssistantDock(QDockWidget):
+    model_state_changed = pyqtSignal(str)
+
+    MODEL_STATE_TEXT = {
+        "unloaded": "Voice models: not loaded",
+        "loading": "Voice models: loading...",
+        "ready": "Voice models: ready",
+        "error": "Voice models: failed to load",
+    }
+
     def __init__(self, parent=None,ide_instance=None):
         super().__init__("Voice Assistant", parent)
         self.ide_instance = ide_instance
+        self.committed_transcription = ""
         self.setup_dock_widget()
         self.setup_ui()
+        self.model_state_changed.connect(self.set_model_state)
         self.hide()
 
     def setup_dock_widget(self):
@@ -44,6 +61,8 @@ class VoiceAssistantDock(QDockWidget):
         dock_layout.setSpacing(5)
 
         self._setup_status_label(dock_layout)
+        self._setup_model_state_label(dock_layout)
+        self._setup_memory_label(dock_layout)
         self._setup_transcription_area(dock_layout)
         self._setup_control_buttons(dock_layout)
         self._add_spacer(dock_layout)
@@ -61,6 +80,45 @@ class VoiceAssistantDock(QDockWidget):
         """)
         layout.addWidget(self.status_label)
 
+    def _setup_model_state_label(self, layout):
+        """Set up the label showing whether the voice models are loaded"""
+        self.model_state_label = QLabel(self.MODEL_STATE_TEXT["unloaded"])
+        self.model_state_label.setStyleSheet("""
+            QLabel {
+                color: #808080;
+                padding: 0px 5px;
+            }
+        """)
+        layout.addWidget(self.model_state_label)
+
+    def _setup_memory_label(self, layout):
+        """Set up the label showing the IDE's resident memory, refreshed while visible"""
+        self.memory_label = QLabel()
+        self.memory_label.setStyleSheet("""
+            QLabel {
+                color: #808080;
+                padding: 0px 5px;
+            }
+        """)
+        layout.addWidget(self.memory_label)
+        self.memory_timer = QTimer(self)
+        self.memory_timer.timeout.connect(self.update_memory_usage)
+        self.memory_timer.start(2000)
+
+    def update_memory_usage(self):
+        """Show the RSS of this process and of the voice engine and model server, if used"""
+        if not self.isVisible():
+            return
+        text = f"Memory: {format_bytes(rss_bytes())}"
+        detector = self.ide_instance.detector if self.ide_instance is not None else None
+        engine_pid = getattr(detector, "pid", None)
+        if engine_pid is not None:
+            text += f" + voice engine {format_bytes(rss_bytes(engine_pid))}"
+        server_pid = getattr(detector, "server_pid", None)
+        if server_pid is not None:
+            text += f" + model server {format_bytes(rss_bytes(server_pid))}"
+        self.memory_label.setText(text)
+
     def _setup_transcription_area(self, layout):
         """Set up the transcription text area"""
         self.transcription_text = NeumorphicTextEdit()
@@ -103,12 +161,15 @@ class VoiceAssistantDock(QDockWidget):
 
         self.start_button = QPushButton("Start Assistant")
         self.stop_button = QPushButton("Stop Assistant")
+        self.unload_button = QPushButton("Free Memory")
+        self.unload_button.setToolTip("Unload the voice models until the assistant is used again")
         self.start_button.clicked.connect(self.ide_instance.start_detector)
         self.stop_button.clicked.connect(self.ide_instance.stop_detector)
+        self.unload_button.clicked.connect(self.unload_models)
         
         self.stop_button.setEnabled(False)
 
-        for button in [self.start_button, self.stop_button]:
+        for button in [self.start_button, self.stop_button, self.unload_button]:
             button.setStyleSheet(button_style)
             control_layout.addWidget(button)
 
@@ -174,9 +235,9 @@ class VoiceAssistantDock(QDockWidget):
         """)
         self.setWidget(scroll_area)
 
-    def on_keyword_detected(self):
+    def on_keyword_detected(self, keyword="alexa"):
         """Handle keyword detection"""
-        self.status_label.setText("Alexa detected! Listening...")
+        self.status_label.setText(f"{keyword_display_name(keyword)} detected! Listening...")
         #self.ai_button.set_active_state(True)
 
     def on_silence_detected(self):
@@ -184,24 +245,61 @@ class VoiceAssistantDock(QDockWidget):
         self.status_label.setText("Processing audio...")
         #self.ai_button.set_processing_state(True)
 
+    def on_partial_transcription(self, partial):
+        """Show the running hypothesis below the finished transcriptions"""
+        if self.committed_transcription:
+            self.transcription_text.setPlainText(f"{self.committed_transcription}\n{partial}")
+        else:
+            self.transcription_text.setPlainText(partial)
+
     def on_transcription_ready(self, transcription):
         """Handle transcription ready"""
-        current_text = self.transcription_text.toPlainText()
-        if current_text:
-            new_text = f"{current_text}\n{transcription}"
+        if self.committed_transcription:
+            self.committed_transcription = f"{self.committed_transcription}\n{transcription}"
         else:
-            new_text = transcription
-        self.transcription_text.setPlainText(new_text)
-        self.status_label.setText("Assistant active - Waiting for 'Alexa'...")
+            self.committed_transcription = transcription
+        self.transcription_text.setPlainText(self.committed_transcription)
+        self.status_label.setText(self.waiting_text())
         #self.ai_button.set_active_state(False)
         #self.ai_button.set_processing_state(False)
 
+    def on_command_recognized(self, match):
+        """Show a recognized voice command in the transcript"""
+        self.on_transcription_ready(f"> {match.text}")
+        self.status_label.setText(f"Command: {match.command.name}")
+
+    def set_model_state(self, state):
+        """Show the voice model readiness state"""
+        self.model_state_label.setText(self.MODEL_STATE_TEXT.get(state, state))
+        detector_running = self.ide_instance is not None and self.ide_instance.detector_thread is not None
+        if state == "ready" and detector_running:
+            self.status_label.setText(self.waiting_text())
+
+    def waiting_text(self):
+        """Status of an idle assistant, naming the configured wake words"""
+        detector = self.ide_instance.detector if self.ide_instance is not None else None
+        keywords = getattr(detector, "keywords", None)
+        if not keywords:
+            return "Assistant active - Waiting for the wake word..."
+        names = " or ".join(f"'{keyword_display_name(keyword)}'" for keyword in keywords)
+        return f"Assistant active - Waiting for {names}..."
+
+    def unload_models(self):
+        """Release the voice models of a stopped assistant"""
+        if not self.ide_instance.detector.unload():
+            self.status_label.setText("Stop the assistant to unload the voice models")
+        self.update_memory_usage()
+
     def toggle_visibility(self):
         """Toggle dock widget visibility"""
         if self.isVisible():
             self.hide()
         else:
             self.show()
+            self.update_memory_usage()
+            # Opening the assistant is a good hint it will be used: warm the models up
+            if self.ide_instance is not None:
+                self.ide_instance.detector.warm()
 
     def update_style(self, dock_area):
         """Update dock widget style based on dock area"""
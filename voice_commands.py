@@ -0,0 +1,138 @@
+import re
+from difflib import SequenceMatcher
+
+SLOT_PATTERN = re.compile(r"\{(\w+)\}")
+
+
+def normalize(text):
+    """Lowercase words without punctuation: "Open main.py!" -> "open main py"."""
+    return " ".join(re.sub(r"[^\w\s]|_", " ", text.lower()).split())
+
+
+class VoiceCommand:
+    """An IDE action and the phrases that trigger it.
+
+    Phrases may contain one ``{slot}``, filled from the grammar's slot
+    values (e.g. "open file {file}"); the action is called with the value.
+    """
+
+    def __init__(self, name, phrases, action):
+        self.name = name
+        self.phrases = list(phrases)
+        self.action = action
+
+
+class CommandMatch:
+    """A recognized command, delivered to the GUI thread to be executed."""
+
+    def __init__(self, command, score, text, value=None):
+        self.command = command
+        self.score = score
+        self.text = text  # what Whisper heard
+        self.value = value  # slot value, e.g. a file path
+
+    def execute(self):
+        if self.value is None:
+            return self.command.action()
+        return self.command.action(self.value)
+
+    def __str__(self):
+        return self.text
+
+
+class CommandGrammar:
+    """Small constrained vocabulary of IDE commands for the voice fast path.
+
+    Slot values come from callables (the project's files change), each
+    returning {spoken form: value}; they are read by ``refresh()``, off the
+    GUI thread, so they must not touch Qt widgets. The candidate phrases
+    are computed once per refresh and reused by ``prompt()`` and ``match()``.
+    """
+
+    def __init__(self, min_score=0.8, max_prompt_chars=400):
+        self.commands = []
+        self.slots = {}
+        self.min_score = min_score
+        self.max_prompt_chars = max_prompt_chars
+        self._candidates = None
+
+    def add(self, name, phrases, action):
+        self.commands.append(VoiceCommand(name, phrases, action))
+        self._candidates = None
+
+    def set_slot(self, slot, values):
+        """Values for ``{slot}``: a dict {spoken form: value} or a callable returning one."""
+        self.slots[slot] = values
+        self._candidates = None
+
+    def add_menu_actions(self, menu_bar, exclude=()):
+        """Make every leaf QAction of a menu bar a command named after its menu path."""
+        def visit(menu, path):
+            for action in menu.actions():
+                if action.isSeparator() or not action.text():
+                    continue
+                if action.menu() is not None:
+                    visit(action.menu(), path + [action.text()])
+                elif path[0] not in exclude:
+                    phrases = [action.text()]
+                    if len(path) > 1:
+                        phrases.append(f"{path[-1]} {action.text()}")
+                    self.add(" > ".join(path + [action.text()]), phrases, action.trigger)
+
+        for action in menu_bar.actions():
+            if action.menu() is not None:
+                visit(action.menu(), [action.text()])
+
+    def slot_values(self, slot):
+        """Current {spoken form: value} of a slot."""
+        values = self.slots.get(slot, {})
+        return values() if callable(values) else values
+
+    def refresh(self):
+        """Re-read the slot values and rebuild the candidate phrases."""
+        candidates = []
+        for command in self.commands:
+            for phrase in command.phrases:
+                if not SLOT_PATTERN.search(phrase):
+                    candidates.append((normalize(phrase), command, None))
+        for command in self.commands:
+            for phrase in command.phrases:
+                slot = SLOT_PATTERN.search(phrase)
+                if slot is None:
+                    continue
+                for spoken, value in self.slot_values(slot.group(1)).items():
+                    candidates.append((normalize(SLOT_PATTERN.sub(spoken, phrase)), command, value))
+        self._candidates = candidates
+        return candidates
+
+    def candidates(self):
+        """(spoken phrase, command, slot value) for every phrase, fixed phrases first."""
+        candidates = self._candidates
+        if candidates is None:
+            candidates = self.refresh()
+        return candidates
+
+    def prompt(self):
+        """Whisper prompt listing the vocabulary, to bias decoding toward it."""
+        parts, length = [], 0
+        for spoken, _, _ in self.candidates():
+            if length + len(spoken) + 2 > self.max_prompt_chars:
+                break
+            parts.append(spoken)
+            length += len(spoken) + 2
+        return ", ".join(parts)
+
+    def match(self, text):
+        """Best CommandMatch for a transcription, or None if nothing scores ``min_score``."""
+        heard = normalize(text)
+        if not heard:
+            return None
+        best = None
+        for spoken, command, value in self.candidates():
+            score = SequenceMatcher(None, heard, spoken).ratio()
+            if best is None or score > best[0]:
+                best = (score, command, value)
+        if best is None or best[0] < self.min_score:
+            return None
+        score, command, value = best
+        return CommandMatch(command, score, text.strip(), value)
@@ -1,13 +1,50 @@
 import numpy as np
-import pyaudio
 import threading
-from openwakeword.model import Model
-import torch
-import whisper
+import queue
 import os
-import noisereduce as nr
-from pydub import AudioSegment
-from io import BytesIO
+import glob
+from functools import partial
+from audio_ring_buffer import AudioRingBuffer
+from audio_hub import get_shared_hub
+from audio_features import to_float, rms_db, frame_db, speech_bounds
+from vad import create_vad
+from wakeword_gate import WakeWordGate
+from noise_suppression import NoiseProfile, SpectralSubtractor
+from streaming_transcriber import StreamingTranscriber
+from transcription_queue import TranscriptionWorkerPool
+from transcription_backends import create_transcription_backend
+from transcription_cache import TranscriptionCache, cache_key, DEFAULT_CACHE_DIR
+from voice_commands import CommandMatch
+from process_memory import release_memory
+from long_form_transcription import LongFormTranscriber, find_split_points, offset_segments, merge_results
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+
+
+def resolve_wakeword_models(wakewords, threshold=0.3, models_dir=MODELS_DIR):
+    """Map wake words to (model path, threshold).
+
+    ``wakewords`` is a name, a list of names or a {name: threshold} dict.
+    A name like "hey_jarvis" matches ``models/hey_jarvis_v*.onnx``; paths to
+    .onnx files are used as they are.
+    """
+    if isinstance(wakewords, str):
+        wakewords = [wakewords]
+    if not isinstance(wakewords, dict):
+        wakewords = {name: threshold for name in wakewords}
+    resolved = {}
+    for name, keyword_threshold in wakewords.items():
+        if name.endswith(".onnx"):
+            path = name
+        else:
+            matches = sorted(glob.glob(os.path.join(models_dir, f"{name}_v*.onnx")) +
+                             glob.glob(os.path.join(models_dir, f"{name}.onnx")))
+            if not matches:
+                raise FileNotFoundError(f"No wake word model for '{name}' in {models_dir}")
+            path = matches[-1]
+        resolved[path] = keyword_threshold
+    return resolved
+
 
 #FIXME - FutureWarning: You are using `torch.load` with `weights_only=False`
 #               Refer to : https://github.com/JaidedAI/EasyOCR/issues/1297
@@ -15,8 +52,14 @@ from io import BytesIO
 class CombinedDetector:
     def __init__(self, rate=16000, chunk_size=1280, silence_threshold=-50, 
                  silence_duration=1.2, history_s=0.5, max_buffer_s=300, 
-                 language="it", whisper_model_dir=os.path.join(os.path.dirname(os.path.abspath(__file__)), "models"), 
-                 whisper_model_version="base", trim_silence_end=1.0):
+                 language="it", whisper_model_dir=MODELS_DIR, 
+                 whisper_model_version="base", trim_silence_end=1.0, trim_silence_start=1.0,
+                 streaming=False, stream_window_s=10.0, stream_step_s=1.0,
+                 max_pending_transcriptions=4, long_form_workers=None, vad="rms", hub=None,
+                 audio_source=None, wakewords=("alexa",), wakeword_threshold=0.3,
+                 low_power=False, denoise="streaming", skip_denoise_snr_db=None, whisper_backend="whisper",
+                 transcription_cache=True, command_grammar=None, command_max_s=4.0, idle_unload_s=300,
+                 capture_rate=None, frames_per_buffer=None):
         self.rate = rate
         self.chunk_size = chunk_size
         self.silence_threshold = silence_threshold
@@ -24,47 +67,218 @@ class CombinedDetector:
         self.history_s = history_s
         self.max_buffer_s = max_buffer_s
         self.transcription_language = language
-        self.max_buffer_size = int(self.max_buffer_s * self.rate / self.chunk_size)
-        self.audio_buffer = []
+        self.history_samples = int(self.history_s * self.rate)
+        self.max_buffer_samples = int(self.max_buffer_s * self.rate)
+        # Holds the pre-roll history while idle and the utterance while recording
+        self.audio_buffer = AudioRingBuffer(self.history_samples + self.max_buffer_samples)
+        self.utterance_start = None  # absolute sample index into audio_buffer
+        self.utterance_end = None
         self.silent_chunks = 0
         self.voiced_chunks = 0
         self.thread = None
         self.trim_silence_end = trim_silence_end  # seconds of silence to trim from end
+        self.trim_silence_start = trim_silence_start  # trim leading silence too when > 0
+        self.trim_frame_s = 0.1
+        self.trim_padding_s = 0.2
+        # End-of-utterance detection: "rms", "adaptive", "onnx" or a VADBackend instance
+        self.vad = create_vad(vad, threshold_db=self.silence_threshold)
+        # Noise reduction: "streaming" spectral subtraction during capture, "nr" (noisereduce
+        # per utterance), "nr_profile" (noisereduce with the cached noise profile) or None.
+        # The noise profile is learned from idle audio and kept between utterances.
+        self.denoise = denoise
+        self.skip_denoise_snr_db = skip_denoise_snr_db  # skip denoising utterances (streaming: chunks) above this SNR
+        self.noise_profile = NoiseProfile(self.rate)
+        self.subtractor = SpectralSubtractor(self.noise_profile) if denoise else None
+        self.denoised_buffer = AudioRingBuffer(self.audio_buffer.capacity) if denoise == "streaming" else None
+        # Per-chunk dB levels of the live input, for the silence detector and visualizers
+        self.level_history = AudioRingBuffer(max(1, int(10 * self.rate / self.chunk_size)), dtype=np.float32)
+        self.last_chunk_db = None
         
-        # Whisper model initialization
+        # Whisper and openWakeWord are loaded lazily by warm() or start()
         self.whisper_model_dir = whisper_model_dir
         self.whisper_model_version = whisper_model_version
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"Using device: {self.device}")
-        self.whisper_model = whisper.load_model(self.whisper_model_version, 
-                                              download_root=self.whisper_model_dir, 
-                                              device=self.device, 
-                                              in_memory=True)
+        # {model path: score threshold}; every model is scored from one shared feature pass
+        self.wakeword_models = resolve_wakeword_models(wakewords, wakeword_threshold)
+        # Names "keyword" events use: openWakeWord names each model after its file
+        self.keywords = [os.path.splitext(os.path.basename(path))[0] for path in self.wakeword_models]
+        self.wakeword_thresholds = {}  # openWakeWord model name -> threshold, filled on load
+        self.last_keyword = None
+        # Low-power mode: only run the wake word model when the audio could be speech
+        # (True for the default gate, or a WakeWordGate instance)
+        if low_power is True:
+            low_power = WakeWordGate(rate=self.rate, chunk_size=self.chunk_size,
+                                     threshold_db=self.silence_threshold)
+        self.wakeword_gate = low_power or None
+        # "whisper" (PyTorch, FP16 on CUDA), "whisper-int8" (dynamically quantized, CPU)
+        # or a TranscriptionBackend instance
+        self.whisper_backend = whisper_backend
+        self.device = None
+        self.whisper_model = None  # the loaded TranscriptionBackend
+        self.oww_model = None
+        self.model_state = "unloaded"  # "unloaded" | "loading" | "ready" | "error"
+        self.model_error = None
+        self.state_callback = None  # called with the new model_state, from any thread
+        self.models_ready = threading.Event()
+        self._load_lock = threading.Lock()
+        self._warm_thread = None
+        # Models are released after this many seconds stopped (None keeps them loaded)
+        self.idle_unload_s = idle_unload_s
+        self._idle_timer = None
         
         # Get Whisper's maximum input length in seconds
         self.whisper_max_length = 30  # Whisper typically handles 30 seconds segments well
+        # Recordings longer than that are split on pauses and decoded on worker processes
+        # (None picks a worker count from the CPU count, 1 decodes sequentially in-process)
+        self.long_form_workers = long_form_workers
+        self.long_form_transcriber = None
+        # Utterance results keyed by a hash of the processed audio and the decoding options, so
+        # retries of the same utterance skip Whisper: True for an in-memory cache, "disk" to
+        # also keep them in DEFAULT_CACHE_DIR across runs (replays, benchmarks), or an instance
+        if transcription_cache is True:
+            transcription_cache = TranscriptionCache()
+        elif transcription_cache == "disk":
+            transcription_cache = TranscriptionCache(DEFAULT_CACHE_DIR)
+        self.transcription_cache = transcription_cache or None
         
-        self.audio = pyaudio.PyAudio()
-        self.stream = self.audio.open(format=pyaudio.paInt16,
-                                    channels=1,
-                                    rate=self.rate,
-                                    input=True,
-                                    frames_per_buffer=self.chunk_size)
+        # Microphone input comes from the capture hub shared with the visualizers;
+        # an AudioSource (e.g. ReplaySource at `rate`) is read directly instead
+        self.hub = hub or get_shared_hub()
+        if hub is None and (capture_rate or frames_per_buffer):
+            # Calibrated by audio_autotune: the device's native rate and PortAudio buffer size
+            capture_rate = capture_rate or self.rate
+            self.hub.configure(rate=capture_rate, chunk_size=self.chunk_size * capture_rate // self.rate,
+                               frames_per_buffer=frames_per_buffer)
+        self.subscription = None
+        self.audio_source = audio_source
         
         self.lock = threading.Lock()
+        self.transcribe_lock = threading.Lock()  # Whisper model is not safe to call concurrently
         self.running = False
         self.keyword_detected = threading.Event()
         self.silence_detected = threading.Event()
-        
-        # Initialize OpenWakeWord model
-        self.oww_model = Model(wakeword_models=[os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "alexa_v0.1.onnx")], inference_framework="onnx")    
+        # ("keyword" | "silence" | "partial" | "transcription" | "command" | "error" | "input_error" | "end_of_input", payload) for the GUI
+        self.events = queue.Queue()
+
+        # Streaming mode transcribes while the user is still speaking
+        self.streaming = streaming
+        self.stream_window_s = stream_window_s
+        self.stream_step_s = stream_step_s
+        self.streamer = None  # StreamingTranscriber of the utterance being recorded
+
+        # Short utterances are first decoded against this CommandGrammar; a confident
+        # match is delivered as a "command" event instead of free-form text
+        self.command_grammar = command_grammar
+        self.command_max_s = command_max_s
+        self.command_min_logprob = -1.0
+        self.command_max_no_speech = 0.6
+
+        # Finished utterances are transcribed off the capture thread
+        self.transcription_pool = TranscriptionWorkerPool(self.recognize_utterance,
+                                                          self._on_transcription_result,
+                                                          max_pending=max_pending_transcriptions)
+
+
+    def _set_model_state(self, state):
+        self.model_state = state
+        if self.state_callback:
+            self.state_callback(state)
+
+    def load_models(self):
+        """Load Whisper and openWakeWord if needed; blocks until they are ready."""
+        self._cancel_idle_unload()
+        with self._load_lock:
+            if self.models_ready.is_set():
+                return
+            self._set_model_state("loading")
+            try:
+                # Heavy imports are deferred so importing this module stays cheap
+                from openwakeword.model import Model
+
+                backend = create_transcription_backend(self.whisper_backend, self.whisper_model_version,
+                                                       self.whisper_model_dir)
+                backend.load()
+                self.device = backend.device
+                print(f"Using device: {self.device} ({backend.name})")
+                self.whisper_model = backend
+                self.oww_model = Model(wakeword_models=list(self.wakeword_models), inference_framework="onnx")
+                # openWakeWord names each model after its file
+                self.wakeword_thresholds = {
+                    os.path.splitext(os.path.basename(path))[0]: threshold
+                    for path, threshold in self.wakeword_models.items()}
+                self.vad.load()
+            except Exception as e:
+                self.model_error = str(e)
+                self._set_model_state("error")
+                raise
+            self.model_error = None
+            self.models_ready.set()
+            self._set_model_state("ready")
+
+    def warm(self):
+        """Load the models on a background thread; returns immediately."""
+        self._cancel_idle_unload()
+        if self.models_ready.is_set() or (self._warm_thread and self._warm_thread.is_alive()):
+            return
+        self._warm_thread = threading.Thread(target=self._warm, daemon=True)
+        self._warm_thread.start()
+
+    def _warm(self):
+        try:
+            self.load_models()
+        except Exception as e:
+            print(f"Error loading voice models: {e}")
+
+    def unload(self):
+        """Release Whisper, openWakeWord and the long-form workers; warm() or start() reload them.
+
+        Returns False (and keeps the models) while the detector is running.
+        """
+        self._cancel_idle_unload()
+        with self._load_lock:
+            if self.running:
+                print("Not unloading the voice models while the detector is running")
+                return False
+            if self.whisper_model is None and self.oww_model is None:
+                return True
+            self.models_ready.clear()
+            if self.long_form_transcriber is not None:
+                self.long_form_transcriber.shutdown()
+                self.long_form_transcriber = None
+            # Wait for an in-flight transcription to let go of the model
+            with self.transcribe_lock:
+                if self.whisper_model is not None:
+                    self.whisper_model.unload()
+                self.whisper_model = None
+                self.oww_model = None
+            release_memory()
+            self._set_model_state("unloaded")
+            return True
+
+    def _schedule_idle_unload(self):
+        self._cancel_idle_unload()
+        if self.idle_unload_s is None or not self.models_ready.is_set():
+            return
+        self._idle_timer = threading.Timer(self.idle_unload_s, self._idle_unload)
+        self._idle_timer.daemon = True
+        self._idle_timer.start()
+
+    def _cancel_idle_unload(self):
+        timer, self._idle_timer = self._idle_timer, None
+        if timer is not None:
+            timer.cancel()
+
+    def _idle_unload(self):
+        if not self.running:
+            print(f"Voice assistant idle for {self.idle_unload_s:.0f}s, unloading models")
+            self.unload()
 
-    
     def get_db(self, audio_data):
-        if audio_data.dtype == np.int16:
-            #Convert audio from int16 to float32 and normalize to float values between -1.0 and +1.0
-            audio_data = audio_data.astype(np.float32) / 32768.0 
-        return 20 * np.log10(np.sqrt(np.mean(np.square(audio_data))) + 1e-10)
+        return rms_db(audio_data)
+
+    def frame_db(self, audio_data, frame_s=None):
+        """Per-frame dB envelope of audio_data (100 ms frames by default)."""
+        frame_samples = max(1, int(self.rate * (frame_s or self.trim_frame_s)))
+        return frame_db(audio_data, frame_samples)
     
     def is_silent(self, audio_data):
         return self.get_db(audio_data) < self.silence_threshold
@@ -72,19 +286,44 @@ class CombinedDetector:
     def detect_keyword_and_silence(self):
         while self.running:
             try:
-                audio_chunk = np.frombuffer(self.stream.read(self.chunk_size), dtype=np.int16)
+                audio_chunk = self._read_chunk()
+                if audio_chunk is None:
+                    self._on_input_closed()
+                    break
+                self.last_chunk_db = self.get_db(audio_chunk)
+                denoised = self.suppress_noise(audio_chunk)
+                with self.lock:
+                    self.audio_buffer.write(audio_chunk)
+                    if denoised is not None:
+                        self.denoised_buffer.write(denoised)
+                self.level_history.write(self.last_chunk_db)
                 if not self.keyword_detected.is_set():
-                    prediction = self.oww_model.predict(audio_chunk)
-                    for mdl in self.oww_model.prediction_buffer.keys():
-                        scores = list(self.oww_model.prediction_buffer[mdl])
-                        curr_score = format(scores[-1], '.20f').replace("-", "")
-                    if float(curr_score[0:5]) > 0.3:
+                    self.vad.observe_idle(audio_chunk, self.last_chunk_db)
+                    keyword = self.detect_keyword(audio_chunk)
+                    if keyword is not None:
+                        with self.lock:
+                            # Start the utterance history_s before the chunk that fired
+                            chunk_start = self.audio_buffer.total_written - len(audio_chunk)
+                            self.utterance_start = max(self.audio_buffer.oldest,
+                                                       chunk_start - self.history_samples)
+                            self.utterance_end = None
+                        self.vad.reset()
+                        self.last_keyword = keyword
                         self.keyword_detected.set()
-                        self.audio_buffer = [audio_chunk]
+                        self.events.put(("keyword", keyword))
+                        if self.streaming:
+                            self.streamer = StreamingTranscriber(
+                                self, window_s=self.stream_window_s, step_s=self.stream_step_s,
+                                on_partial=lambda text: self.events.put(("partial", text)))
+                            self.streamer.start()
                 else:
-                    self.audio_buffer.append(audio_chunk)
-                    
-                    if self.is_silent(audio_chunk):
+                    recorded = self.audio_buffer.total_written - self.utterance_start
+                    if recorded >= self.max_buffer_samples:
+                        # The utterance ends once max_buffer_samples have been recorded
+                        self.end_utterance()
+                        continue
+
+                    if not self.vad.is_speech(audio_chunk, self.last_chunk_db):
                         self.silent_chunks += 1
                         self.voiced_chunks = 0
                     else:
@@ -92,77 +331,219 @@ class CombinedDetector:
                         self.voiced_chunks += 1
                     
                     if self.silent_chunks > self.silence_duration * self.rate / self.chunk_size:
-                        self.silence_detected.set()
-                        self.reset_buffer()
+                        self.end_utterance()
             except Exception as e:
                 print(f"Error in detect_keyword_and_silence: {e}")
                 self.stop()
 
+    def _read_chunk(self):
+        if self.audio_source is not None:
+            return self.audio_source.read(self.chunk_size)
+        return self.subscription.read(self.chunk_size)
+
+    def _on_input_closed(self):
+        if not self.running:
+            return  # unsubscribed by stop()
+        if self.audio_source is None:
+            if self.hub.error:
+                self.events.put(("input_error", self.hub.error))
+            return
+        # End of a replayed recording: finish the utterance it was in the middle of
+        if self.keyword_detected.is_set():
+            self.end_utterance()
+        self.events.put(("end_of_input", None))
+
+    def suppress_noise(self, audio_chunk):
+        """Update the noise profile from idle audio; in streaming mode return the denoised chunk (int16)."""
+        if self.subtractor is None:
+            return None
+        # Learn only from idle chunks near the noise floor, not from the wake word itself
+        learn = (not self.keyword_detected.is_set() and
+                 (not self.noise_profile.ready or self.last_chunk_db <= self.noise_profile.level_db + 6))
+        if self.denoised_buffer is None:
+            if learn:
+                self.subtractor.process(audio_chunk, learn=True)
+            return None
+        noise_db = self.noise_profile.level_db
+        clean = (self.skip_denoise_snr_db is not None and noise_db is not None and
+                 self.last_chunk_db - noise_db >= self.skip_denoise_snr_db)
+        denoised = self.subtractor.process(audio_chunk, learn=learn, bypass=clean)
+        return np.clip(np.round(denoised * 32768.0), -32768, 32767).astype(np.int16)
+
+    def detect_keyword(self, audio_chunk):
+        """Score every wake word model on the chunk; the name of the best one over its threshold, or None."""
+        if self.wakeword_gate is not None:
+            audio_chunk = self.wakeword_gate.admit(audio_chunk, self.last_chunk_db)
+            if audio_chunk is None:
+                return None
+        # The melspectrogram and embedding are computed once and shared by all models
+        prediction = self.oww_model.predict(audio_chunk)
+        best, best_margin = None, 0.0
+        for name, score in prediction.items():
+            margin = score - self.wakeword_thresholds.get(name, 1.0)
+            if margin > 0 and (best is None or margin > best_margin):
+                best, best_margin = name, margin
+        return best
+
+    def end_utterance(self):
+        """Freeze the current utterance and queue it for transcription."""
+        with self.lock:
+            self.utterance_end = self.audio_buffer.total_written
+        # Copy once: the ring keeps being overwritten while the job waits
+        audio = np.array(self.get_audio_data())
+        streamer, self.streamer = self.streamer, None
+        if streamer:
+            # No new passes: the ring now moves on to the next utterance
+            streamer.stop_passes()
+        self.silence_detected.set()
+        self.reset_buffer()
+        try:
+            # Faster-than-realtime replay waits for a free slot instead of dropping utterances
+            block = self.audio_source is not None and not self.audio_source.realtime
+            finalize = partial(self.recognize_utterance, streamer=streamer) if streamer else None
+            job_id = self.transcription_pool.submit(audio, finalize=finalize,
+                                                    block=block)
+            self.events.put(("silence", job_id))
+        except queue.Full:
+            if streamer:
+                streamer.cancel()
+            self.events.put(("silence", None))
+
+    def _on_transcription_result(self, job_id, text, error):
+        if error is None and isinstance(text, CommandMatch):
+            self.events.put(("command", (job_id, text)))
+        elif error is None:
+            self.events.put(("transcription", (job_id, text)))
+        else:
+            self.events.put(("error", (job_id, error)))
+
     def start(self):
+        self.load_models()
         self.running = True
+        # Drop events left over from a previous session
+        while not self.events.empty():
+            self.events.get_nowait()
+        self.transcription_pool.start()
+        if self.subtractor is not None:
+            self.subtractor.reset()
+        if self.audio_source is not None:
+            self.audio_source.open()
+        else:
+            self.subscription = self.hub.subscribe(rate=self.rate, buffer_s=self.history_s + 2.0)
         self.thread = threading.Thread(target=self.detect_keyword_and_silence)
-        self.audio = pyaudio.PyAudio()
-        self.stream = self.audio.open(format=pyaudio.paInt16,
-                                    channels=1,
-                                    rate=self.rate,
-                                    input=True,
-                                    frames_per_buffer=self.chunk_size)
         self.thread.start()
     
     def stop(self):
         self.running = False
+        if self.streamer:
+            self.streamer.cancel()
+            self.streamer = None
+        self.transcription_pool.stop()
         try:
             self.reset_buffer()
         except Exception as e:
             print(f"Error before stop: {e}")
             
-        try:
-            self.stream.stop_stream()
-            self.stream.close()
-            self.audio.terminate()
-        except Exception as e:
-            print(f"Error during stop: {e}")
+        subscription, self.subscription = self.subscription, None
+        if subscription is not None:
+            # Unblocks the capture thread; the hub releases the device with its last subscriber
+            subscription.close()
+        if self.audio_source is not None:
+            self.audio_source.close()
+        self._schedule_idle_unload()
 
     def get_audio_data(self):
-        return np.concatenate(self.audio_buffer)
-    
+        """Return a zero-copy int16 view of the last utterance, pre-roll included."""
+        with self.lock:
+            if self.utterance_start is None:
+                return np.zeros(0, dtype=np.int16)
+            end = self.utterance_end if self.utterance_end is not None else self.audio_buffer.total_written
+            start = max(self.utterance_start, self.audio_buffer.oldest)
+            if self.denoised_buffer is None:
+                return self.audio_buffer.view(start, end)
+            # The denoised stream lags the raw one by the subtractor latency; at most
+            # that much of the trailing silence is not denoised yet and is left out
+            latency = self.subtractor.latency
+            end = min(end + latency, self.denoised_buffer.total_written)
+            start = min(max(start + latency, self.denoised_buffer.oldest), end)
+            return self.denoised_buffer.view(start, end)
+
     def reset_audio_data(self):
         with self.lock:
-            self.audio_buffer = np.zeros((self.max_buffer_size, self.chunk_size), dtype=np.int16)
+            self.utterance_start = None
+            self.utterance_end = None
 
     def reset_buffer(self):
         self.keyword_detected.clear()
         self.silence_detected.clear()
         self.silent_chunks = 0
         self.voiced_chunks = 0
-        self.oww_model.reset()
-    def process_audio(self, audio_data):
+        if self.oww_model is not None:
+            self.oww_model.reset()
+        if self.wakeword_gate is not None:
+            self.wakeword_gate.reset()
+    def process_audio(self, audio_data, trim_leading=True):
         """Process audio data with noise reduction and silence trimming."""
         # Convert to float32 if needed
-        if audio_data.dtype == np.int16:
-            audio_float = audio_data.astype(np.float32) / 32768.0
-        else:
-            audio_float = audio_data
+        audio_float = to_float(audio_data)
 
-        # Apply noise reduction
-        reduced_noise = nr.reduce_noise(y=audio_float, sr=self.rate)
+        reduced_noise = self.reduce_noise(audio_float)
         
-        # Find the end of speech (before last silence)
-        if self.trim_silence_end > 0:
-            chunk_samples = int(self.rate * 0.1)  # Analysis window size
-            chunks = len(reduced_noise) // chunk_samples
-            
-            # Analyze chunks from end to find last non-silent chunk
-            for i in range(chunks - 1, -1, -1):
-                chunk = reduced_noise[i * chunk_samples:(i + 1) * chunk_samples]
-                if self.get_db(chunk) > self.silence_threshold:
-                    # Keep audio up to this point plus a small buffer
-                    keep_samples = min(len(reduced_noise),
-                                    (i + 1) * chunk_samples + int(self.rate * 0.2))
-                    reduced_noise = reduced_noise[:keep_samples]
-                    break
+        # One vectorized energy envelope serves both the leading and trailing trim
+        trim_start = trim_leading and self.trim_silence_start > 0
+        if self.trim_silence_end > 0 or trim_start:
+            frame_samples = int(self.rate * self.trim_frame_s)
+            bounds = speech_bounds(frame_db(reduced_noise, frame_samples), self.silence_threshold)
+            if bounds is not None:
+                first, last = bounds
+                padding = int(self.rate * self.trim_padding_s)
+                # Keep a small buffer around the speech on the trimmed sides
+                start = max(0, first * frame_samples - padding) if trim_start else 0
+                end = len(reduced_noise)
+                if self.trim_silence_end > 0:
+                    end = min(end, (last + 1) * frame_samples + padding)
+                reduced_noise = reduced_noise[start:end]
         
         return reduced_noise
+    def reduce_noise(self, audio_float):
+        """Per-utterance noise reduction for the configured ``denoise`` mode."""
+        if self.denoise in (None, "streaming"):
+            # Streaming audio was already denoised chunk by chunk during capture
+            return audio_float
+        noise_db = self.noise_profile.level_db
+        if self.skip_denoise_snr_db is not None and noise_db is not None and len(audio_float):
+            speech_db = np.percentile(self.frame_db(audio_float), 90)
+            if speech_db - noise_db >= self.skip_denoise_snr_db:
+                return audio_float
+        import noisereduce as nr
+        if self.denoise == "nr_profile" and self.noise_profile.ready:
+            # Noise statistics come from the cached idle clip instead of being re-estimated
+            return nr.reduce_noise(y=audio_float, sr=self.rate, y_noise=self.noise_profile.noise_clip(),
+                                   stationary=True)
+        return nr.reduce_noise(y=audio_float, sr=self.rate)
+
+    def transcribe_window(self, audio, prompt=None):
+        """Transcribe a short window and return the raw Whisper result with segments."""
+        # No leading trim: segment timestamps must stay relative to the window start.
+        # Not cached: live streaming windows never repeat.
+        processed_audio = self.process_audio(audio, trim_leading=False).astype(np.float32, copy=False)
+        with self.transcribe_lock:
+            result = self.whisper_model.transcribe(
+                processed_audio,
+                language=self.transcription_language,
+                initial_prompt=prompt or None,
+                condition_on_previous_text=False,
+            )
+        return result
+
+    def _cached(self, processed_audio, **options):
+        """(cache key, cached result or None) for processed audio; (None, None) without a cache."""
+        if self.transcription_cache is None:
+            return None, None
+        key = cache_key(processed_audio, backend=self.whisper_model.name, model=self.whisper_model_version,
+                        language=self.transcription_language, max_length=self.whisper_max_length, **options)
+        return key, self.transcription_cache.get(key)
+
     def transcribe_audio(self, audio):
         """Transcribe audio with handling for long recordings."""
         # Process audio with noise reduction and silence trimming
@@ -172,31 +553,82 @@ class CombinedDetector:
         if processed_audio.dtype != np.float32:
             processed_audio = processed_audio.astype(np.float32)
         
+        key, cached = self._cached(processed_audio, kind="utterance")
+        if cached is not None:
+            return cached
+
         # Calculate duration in seconds
         duration = len(processed_audio) / self.rate
         
-        # If audio is longer than whisper_max_length, split and process in chunks
+        # If audio is longer than whisper_max_length, split on pauses and process in segments
         if duration > self.whisper_max_length:
-            chunk_size = int(self.whisper_max_length * self.rate)
-            transcriptions = []
-            
-            for i in range(0, len(processed_audio), chunk_size):
-                chunk = processed_audio[i:i + chunk_size]
+            text = self.transcribe_long_form(processed_audio)["text"]
+        else:
+            # For shorter audio, process normally
+            with self.transcribe_lock:
                 result = self.whisper_model.transcribe(
-                    chunk,
+                    processed_audio,
                     language=self.transcription_language,
-                    fp16=self.device == "cuda",
                     #task="translate"
                 )
-                transcriptions.append(result["text"])
-            
-            return " ".join(transcriptions)
-        else:
-            # For shorter audio, process normally
-            result = self.whisper_model.transcribe(
-                processed_audio,
-                language=self.transcription_language,
-                fp16=self.device == "cuda",
-                #task="translate"
-            )
-            return result["text"]
+            text = result["text"]
+        if key is not None:
+            self.transcription_cache.put(key, text)
+        return text
+
+    def recognize_utterance(self, audio, streamer=None):
+        """A CommandMatch for short voice commands, otherwise the free-form transcription."""
+        command = self.recognize_command(audio)
+        if command is not None:
+            if streamer:
+                streamer.cancel()
+            return command
+        if streamer:
+            return streamer.finish(audio)
+        return self.transcribe_audio(audio)
+
+    def recognize_command(self, audio):
+        """Fast path: one short, vocabulary-biased decode matched against the command grammar."""
+        if self.command_grammar is None or len(audio) > self.command_max_s * self.rate:
+            return None
+        processed_audio = self.process_audio(audio).astype(np.float32, copy=False)
+        if len(processed_audio) == 0:
+            return None
+        with self.transcribe_lock:
+            result = self.whisper_model.decode_short(processed_audio, language=self.transcription_language,
+                                                     prompt=self.command_grammar.prompt())
+        # Low decoder confidence: the biased prompt may have made up a command
+        if result["avg_logprob"] < self.command_min_logprob or result["no_speech_prob"] > self.command_max_no_speech:
+            return None
+        return self.command_grammar.match(result["text"])
+
+    def transcribe_long_form(self, processed_audio):
+        """Transcribe a long float32 recording; returns merged text and absolute-time segments."""
+        cuts = find_split_points(processed_audio, self.rate, max_segment_s=self.whisper_max_length)
+        if self.device == "cpu" and self.long_form_workers != 1 and len(cuts) > 2:
+            if self.long_form_transcriber is None:
+                self.long_form_transcriber = LongFormTranscriber(self.whisper_model_version,
+                                                                 self.whisper_model_dir,
+                                                                 self.transcription_language,
+                                                                 workers=self.long_form_workers,
+                                                                 backend=self.whisper_model.name)
+            return self.long_form_transcriber.transcribe(processed_audio, self.rate, cuts)
+
+        # On the GPU one shared model is faster than several process-local copies
+        results = []
+        for start, end in zip(cuts[:-1], cuts[1:]):
+            with self.transcribe_lock:
+                result = self.whisper_model.transcribe(
+                    processed_audio[start:end],
+                    language=self.transcription_language,
+                )
+            results.append(offset_segments(result, start / self.rate))
+        return merge_results(results)
+
+    def close(self):
+        """Stop capturing and release the long-form worker processes."""
+        self.stop()
+        self._cancel_idle_unload()
+        if self.long_form_transcriber is not None:
+            self.long_form_transcriber.shutdown()
+            self.long_form_transcriber = None
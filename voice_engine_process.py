@@ -0,0 +1,499 @@
+"""CombinedDetector in a child process, so torch and Whisper don't hold the GUI's GIL.
+
+The parent talks to the engine over a multiprocessing Pipe. Requests are
+(request id, op, args) and the engine sends back tagged messages:
+
+    ("hello", {"version", "pid", "keywords", "error"})   once, after the detector is built
+    ("reply", (request id, ok, result))       answer to a request
+    ("event", (event, payload))               detector events, as in CombinedDetector.events
+    ("state", (model state, error, pid))      model load state changes, with the model server's pid if used
+    ("metrics", transcription pool metrics)   sent before each "silence" event
+    ("audio", (rate, int16 samples))          microphone chunks, while the IDE asks for them
+
+Command actions can't cross the process boundary: the engine gets the
+grammar's phrases and slot values and answers with the command's name,
+which the parent turns back into a CommandMatch. Visualizers read the
+engine's microphone through RemoteAudioHub, so the device is opened once,
+by the engine.
+"""
+import os
+import time
+import queue
+import threading
+import multiprocessing
+import numpy as np
+
+from audio_hub import AudioSubscription, fan_out
+from voice_commands import CommandGrammar, CommandMatch
+
+PROTOCOL_VERSION = 4
+
+
+def grammar_spec(grammar):
+    """Picklable copy of a CommandGrammar: phrases and current slot values, no actions."""
+    return {
+        "commands": [(command.name, command.phrases) for command in grammar.commands],
+        "slots": {slot: grammar.slot_values(slot) for slot in grammar.slots},
+        "min_score": grammar.min_score,
+        "max_prompt_chars": grammar.max_prompt_chars,
+    }
+
+
+def _grammar_from_spec(spec):
+    grammar = CommandGrammar(spec["min_score"], spec["max_prompt_chars"])
+    for name, phrases in spec["commands"]:
+        grammar.add(name, phrases, None)
+    for slot, values in spec["slots"].items():
+        grammar.set_slot(slot, values)
+    grammar.refresh()
+    return grammar
+
+
+def _engine_main(conn, detector_kwargs):
+    """Entry point of the engine process."""
+    send_lock = threading.Lock()
+
+    def send(kind, payload):
+        with send_lock:
+            conn.send((kind, payload))
+
+    try:
+        from voice_detection_module import CombinedDetector
+        detector = CombinedDetector(**detector_kwargs)
+    except Exception as e:
+        send("hello", {"version": PROTOCOL_VERSION, "pid": os.getpid(), "keywords": [],
+                       "error": f"{type(e).__name__}: {e}"})
+        return
+    detector.state_callback = lambda state: send(
+        "state", (state, detector.model_error, getattr(detector.whisper_model, "server_pid", None)))
+    send("hello", {"version": PROTOCOL_VERSION, "pid": os.getpid(), "keywords": detector.keywords, "error": None})
+    threading.Thread(target=_forward_events, args=(detector, send), daemon=True).start()
+    audio = _AudioForwarder(detector.hub, send)
+    try:
+        while True:
+            request_id, op, args = conn.recv()
+            if op == "close":
+                break
+            try:
+                send("reply", (request_id, True, _handle(detector, audio, op, args)))
+            except Exception as e:
+                send("reply", (request_id, False, f"{type(e).__name__}: {e}"))
+    except (EOFError, OSError):
+        pass  # the IDE went away
+    finally:
+        audio.set_enabled(False)
+        detector.close()
+
+
+def _handle(detector, audio, op, args):
+    if op == "start":
+        detector.start()
+    elif op == "stop":
+        detector.stop()
+    elif op == "warm":
+        detector.warm()
+    elif op == "unload":
+        return detector.unload()
+    elif op == "grammar":
+        detector.command_grammar = _grammar_from_spec(args) if args else None
+    elif op == "audio":
+        audio.set_enabled(args)
+    else:
+        raise ValueError(f"Unknown voice engine request '{op}'")
+
+
+def _forward_events(detector, send):
+    while True:
+        event, payload = detector.events.get()
+        if event == "command":
+            job_id, match = payload
+            payload = (job_id, (match.command.name, match.score, match.text, match.value))
+        elif event == "silence":
+            send("metrics", detector.transcription_pool.metrics())
+        send("event", (event, payload))
+
+
+class _AudioForwarder:
+    """Engine side of RemoteAudioHub: sends the hub's chunks to the IDE while enabled."""
+
+    def __init__(self, hub, send, rate=16000):
+        self.hub = hub
+        self.send = send
+        self.rate = rate
+        self.subscription = None
+
+    def set_enabled(self, enabled):
+        if enabled and self.subscription is None:
+            self.subscription = self.hub.subscribe(rate=self.rate, buffer_s=1.0)
+            threading.Thread(target=self._run, args=(self.subscription,), daemon=True).start()
+        elif not enabled and self.subscription is not None:
+            self.subscription.close()
+            self.subscription = None
+
+    def _run(self, subscription):
+        frame = int(self.rate * self.hub.chunk_size / self.hub.rate)
+        while True:
+            chunk = subscription.read(frame)
+            if chunk is None:
+                return
+            try:
+                self.send("audio", (self.rate, chunk))
+            except (OSError, ValueError):
+                return  # the IDE went away
+
+
+class RemoteAudioHub:
+    """GUI-side stand-in for the engine's AudioCaptureHub, for visualizers.
+
+    Subscriptions are fed with the chunks the engine captures, while the
+    engine is running; ``subscribe``, ``latest`` and ``close`` work as on
+    the real hub.
+    """
+
+    def __init__(self, engine, rate=16000):
+        self.engine = engine
+        self.rate = rate
+        self.subscribers = []
+        self.lock = threading.Lock()
+
+    def subscribe(self, rate=None, dtype=np.int16, buffer_s=5.0):
+        subscription = AudioSubscription(self, rate or self.rate, dtype, buffer_s)
+        with self.lock:
+            self.subscribers.append(subscription)
+            first = len(self.subscribers) == 1
+        if first:
+            self.engine._send_audio_request()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            was_last = subscription in self.subscribers and len(self.subscribers) == 1
+            if subscription in self.subscribers:
+                self.subscribers.remove(subscription)
+        subscription._close()
+        if was_last:
+            self.engine._send_audio_request()
+
+    def has_subscribers(self):
+        with self.lock:
+            return bool(self.subscribers)
+
+    def _push(self, rate, chunk):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        fan_out(chunk, rate, subscribers)
+
+
+class RemotePoolMetrics:
+    """Stands in for the engine's TranscriptionWorkerPool: metrics as of the last "silence" event."""
+
+    def __init__(self):
+        self.last = {"outstanding": 0}
+
+    def metrics(self):
+        return dict(self.last)
+
+
+class VoiceEngineProcess:
+    """GUI-side stand-in for CombinedDetector, with the detector running in a child process.
+
+    Offers what the IDE uses: ``events``, ``start``/``stop``/``warm``/
+    ``unload``/``close``, ``models_ready``, ``model_state`` and
+    ``state_callback``, ``command_grammar`` (re-sent by
+    ``refresh_command_grammar`` when its slot values change), plus
+    ``audio_hub`` for the visualizers. The engine is started lazily,
+    must answer the handshake within ``handshake_timeout_s``, and is
+    restarted (and resumed, if it was running) when it dies; more than
+    ``max_restarts`` crashes within ``restart_window_s`` is reported as an
+    "input_error" event instead.
+    """
+
+    def __init__(self, handshake_timeout_s=60.0, max_restarts=3, restart_window_s=60.0, **detector_kwargs):
+        self.detector_kwargs = detector_kwargs  # passed to CombinedDetector, must be picklable
+        self.handshake_timeout_s = handshake_timeout_s
+        self.max_restarts = max_restarts
+        self.restart_window_s = restart_window_s
+        self.events = queue.Queue()
+        self.models_ready = threading.Event()
+        self.model_state = "unloaded"
+        self.model_error = None
+        self.state_callback = None
+        self.command_grammar = None
+        self.transcription_pool = RemotePoolMetrics()
+        self.audio_hub = RemoteAudioHub(self)
+        self.whisper_model = None  # lives in the engine
+        self.server_pid = None  # model server the engine's backend uses, if any
+        self.keywords = None  # wake word names, known once the engine has started
+        self.running = False
+        self.pid = None
+        self.crash_times = []
+
+        self.context = multiprocessing.get_context("spawn")  # forking a Qt process is unsafe
+        self.process = None
+        self.conn = None
+        self.reader = None
+        self.lock = threading.RLock()  # guards the process, connection and pending replies
+        self.send_lock = threading.Lock()
+        self.pending = {}  # request id -> [threading.Event, ok, result]
+        self.next_request_id = 0
+        self._warm_thread = None
+        self._grammar_thread = None
+        self._grammar_dirty = False
+        self._closing = False
+
+    def _set_model_state(self, state, error=None):
+        self.model_state = state
+        self.model_error = error
+        if state == "ready":
+            self.models_ready.set()
+        else:
+            self.models_ready.clear()
+        if self.state_callback:
+            self.state_callback(state)
+
+    def _ensure_engine(self):
+        with self.lock:
+            if self.process is not None and self.process.is_alive():
+                return
+            self._closing = False
+            parent_conn, child_conn = self.context.Pipe()
+            process = self.context.Process(target=_engine_main, args=(child_conn, self.detector_kwargs),
+                                           name="aidee-voice-engine", daemon=True)
+            process.start()
+            child_conn.close()
+            try:
+                hello = self._handshake(parent_conn, process)
+            except Exception:
+                process.terminate()
+                parent_conn.close()
+                raise
+            self.process, self.conn, self.pid = process, parent_conn, hello["pid"]
+            self.keywords = hello["keywords"]
+            self.reader = threading.Thread(target=self._read_messages, args=(process, parent_conn), daemon=True)
+            self.reader.start()
+            print(f"Voice engine running in process {self.pid}")
+            if self.audio_hub.has_subscribers():
+                self._send_audio_request()
+
+    def _handshake(self, conn, process):
+        deadline = time.monotonic() + self.handshake_timeout_s
+        while not conn.poll(0.1):
+            if not process.is_alive():
+                raise RuntimeError(f"Voice engine exited during startup (exit code {process.exitcode})")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Voice engine did not answer within {self.handshake_timeout_s:.0f}s")
+        kind, hello = conn.recv()
+        if kind != "hello" or hello.get("version") != PROTOCOL_VERSION:
+            raise RuntimeError(f"Unexpected voice engine handshake: {kind} {hello}")
+        if hello["error"]:
+            raise RuntimeError(f"Voice engine failed to start: {hello['error']}")
+        return hello
+
+    def _read_messages(self, process, conn):
+        try:
+            while True:
+                kind, payload = conn.recv()
+                if kind == "reply":
+                    request_id, ok, result = payload
+                    with self.lock:
+                        waiter = self.pending.pop(request_id, None)
+                    if waiter is not None:
+                        waiter[1:] = [ok, result]
+                        waiter[0].set()
+                elif kind == "event":
+                    self._on_event(*payload)
+                elif kind == "state":
+                    state, error, self.server_pid = payload
+                    self._set_model_state(state, error)
+                elif kind == "metrics":
+                    self.transcription_pool.last = payload
+                elif kind == "audio":
+                    self.audio_hub._push(*payload)
+        except (EOFError, OSError):
+            pass
+        self._on_engine_exit(process)
+
+    def _on_event(self, event, payload):
+        if event == "command":
+            job_id, (name, score, text, value) = payload
+            commands = self.command_grammar.commands if self.command_grammar is not None else []
+            command = next((c for c in commands if c.name == name), None)
+            if command is None:
+                event, payload = "transcription", (job_id, text)
+            else:
+                payload = (job_id, CommandMatch(command, score, text, value))
+        self.events.put((event, payload))
+
+    def _on_engine_exit(self, process):
+        with self.lock:
+            if process is not self.process:
+                return
+            self.process, self.conn, self.pid, self.server_pid = None, None, None, None
+            pending, self.pending = self.pending, {}
+        for waiter in pending.values():
+            waiter[1:] = [False, "Voice engine exited"]
+            waiter[0].set()
+        process.join(1)
+        was_ready = self.models_ready.is_set()
+        self._set_model_state("unloaded")
+        if self._closing:
+            return
+        print(f"Voice engine exited unexpectedly (exit code {process.exitcode})")
+        now = time.monotonic()
+        self.crash_times = [t for t in self.crash_times if now - t < self.restart_window_s] + [now]
+        if len(self.crash_times) > self.max_restarts:
+            self.running = False
+            self.events.put(("input_error", "Voice engine keeps crashing, giving up"))
+            return
+        if self.running or was_ready:
+            threading.Thread(target=self._restart, daemon=True).start()
+
+    def _restart(self):
+        try:
+            self._ensure_engine()
+            self._send_grammar()
+            if self.running:
+                self._request("start")
+            else:
+                self._request("warm")
+        except Exception as e:
+            print(f"Could not restart the voice engine: {e}")
+            if self.running:
+                self.running = False
+                self.events.put(("input_error", f"Voice engine restart failed: {e}"))
+
+    def _send(self, op, args=None):
+        with self.lock:
+            if self.conn is None:
+                raise RuntimeError("Voice engine is not running")
+            self.next_request_id += 1
+            request_id = self.next_request_id
+            waiter = [threading.Event(), None, None]
+            self.pending[request_id] = waiter
+            conn = self.conn
+        with self.send_lock:
+            conn.send((request_id, op, args))
+        return waiter
+
+    def _request(self, op, args=None, timeout=None):
+        waiter = self._send(op, args)
+        if not waiter[0].wait(timeout):
+            raise TimeoutError(f"Voice engine did not answer '{op}' within {timeout}s")
+        _, ok, result = waiter
+        if not ok:
+            raise RuntimeError(result)
+        return result
+
+    def _send_audio_request(self):
+        """Tell the engine whether visualizers want its audio; doesn't wait for the answer."""
+        if self.conn is None:
+            return  # sent once the engine has started
+        try:
+            self._send("audio", self.audio_hub.has_subscribers())
+        except Exception as e:
+            print(f"Could not update the voice engine's audio forwarding: {e}")
+
+    def _send_grammar(self):
+        grammar = self.command_grammar
+        try:
+            self._request("grammar", grammar_spec(grammar) if grammar is not None else None, timeout=10)
+        except Exception as e:
+            print(f"Could not send voice commands to the engine: {e}")
+
+    def refresh_command_grammar(self):
+        """Re-send the grammar's slot values (e.g. after the project's files changed).
+
+        Returns immediately; changes arriving while a refresh is in flight
+        are folded into one more refresh once it is done.
+        """
+        if self.command_grammar is None or self.conn is None:
+            return  # start() and restarts send the grammar
+        with self.lock:
+            self._grammar_dirty = True
+            if self._grammar_thread is not None:
+                return
+            self._grammar_thread = threading.Thread(target=self._refresh_grammar, daemon=True)
+            self._grammar_thread.start()
+
+    def _refresh_grammar(self):
+        while True:
+            with self.lock:
+                if not self._grammar_dirty:
+                    self._grammar_thread = None
+                    return
+                self._grammar_dirty = False
+            self._send_grammar()
+
+    def start(self):
+        """Start listening; blocks until the engine has loaded its models."""
+        self._ensure_engine()
+        self._send_grammar()
+        while not self.events.empty():
+            self.events.get_nowait()
+        self.running = True
+        try:
+            self._request("start")
+        except Exception:
+            self.running = False
+            raise
+
+    def stop(self):
+        """Stop listening; doesn't wait for the engine to answer."""
+        self.running = False
+        if self.conn is not None:
+            try:
+                self._send("stop")
+            except Exception as e:
+                print(f"Error stopping the voice engine: {e}")
+
+    def warm(self):
+        """Start the engine and load its models in the background; returns immediately."""
+        if self.models_ready.is_set() or (self._warm_thread and self._warm_thread.is_alive()):
+            return
+        self._warm_thread = threading.Thread(target=self._warm, daemon=True)
+        self._warm_thread.start()
+
+    def _warm(self):
+        try:
+            self._ensure_engine()
+            self._request("warm")
+        except Exception as e:
+            print(f"Error starting the voice engine: {e}")
+
+    def unload(self):
+        """Shut the engine down, returning all of its memory; False while running."""
+        if self.running:
+            print("Not unloading the voice models while the detector is running")
+            return False
+        self.close()
+        return True
+
+    def close(self):
+        """Ask the engine to exit; it is joined (or terminated) on a background thread."""
+        with self.lock:
+            process, conn = self.process, self.conn
+            self._closing = True
+            # Detached right away, so start() or warm() spawn a new engine instead of using this one
+            self.process, self.conn, self.pid, self.server_pid = None, None, None, None
+            pending, self.pending = self.pending, {}
+        self.running = False
+        if process is None:
+            return
+        for waiter in pending.values():
+            waiter[1:] = [False, "Voice engine closed"]
+            waiter[0].set()
+        try:
+            with self.send_lock:
+                conn.send((0, "close", None))
+        except (OSError, ValueError):
+            pass
+        self._set_model_state("unloaded")
+        # Not a daemon thread: on exit the interpreter waits for it, so the engine can close cleanly
+        threading.Thread(target=self._reap, args=(process,), name="aidee-voice-engine-reaper").start()
+
+    def _reap(self, process):
+        process.join(10)
+        if process.is_alive():
+            print("Voice engine did not exit, terminating it")
+            process.terminate()
+            process.join(2)
@@ -0,0 +1,90 @@
+import numpy as np
+from audio_features import rms_db
+
+
+def zero_crossing_rate(chunk):
+    """Fraction of consecutive samples that change sign."""
+    if len(chunk) < 2:
+        return 0.0
+    signs = np.signbit(chunk)
+    return float(np.count_nonzero(signs[1:] != signs[:-1])) / (len(chunk) - 1)
+
+
+class WakeWordGate:
+    """Low-power mode for the wake word model.
+
+    A cheap RMS / zero-crossing test decides whether a chunk could contain
+    speech. While it can (and for ``hangover_s`` after), every chunk is
+    scored. While the room is quiet only every ``quiet_stride``-th chunk is
+    scored (0 never scores quiet audio), and the chunks before it are
+    dropped: openWakeWord computes features for all audio it is given, so
+    scoring them later would save nothing. The unscored chunks since the
+    last scored one (up to ``pre_roll_s``) are held back, and scored with
+    the current one when the gate opens, so the start of the wake word is
+    not lost; openWakeWord takes the highest score over the batch.
+    """
+
+    def __init__(self, rate=16000, chunk_size=1280, threshold_db=-50.0, zcr_min=0.01, zcr_max=0.45,
+                 hangover_s=1.0, quiet_stride=4, pre_roll_s=1.0):
+        self.threshold_db = threshold_db
+        self.zcr_min = zcr_min
+        self.zcr_max = zcr_max
+        self.hangover_chunks = int(np.ceil(hangover_s * rate / chunk_size))
+        self.quiet_stride = quiet_stride
+        self.pre_roll_chunks = max(0, int(np.ceil(pre_roll_s * rate / chunk_size)))
+        self.pending = []
+        self.open_chunks = 0
+        self.quiet_chunks = 0
+        self.chunks_seen = 0
+        self.inferences = 0
+        self.chunks_scored = 0
+        self.chunks_dropped = 0
+
+    def reset(self):
+        """Forget held-back audio, e.g. after a detection or when listening restarts."""
+        self.pending = []
+        self.open_chunks = 0
+        self.quiet_chunks = 0
+
+    def maybe_speech(self, chunk, level_db=None):
+        if level_db is None:
+            level_db = rms_db(chunk)
+        if level_db < self.threshold_db:
+            return False
+        # Hum stays below zcr_min, hiss and clicks above zcr_max
+        return self.zcr_min <= zero_crossing_rate(chunk) <= self.zcr_max
+
+    def admit(self, chunk, level_db=None):
+        """Audio the wake word model should score now, or None to skip this chunk."""
+        self.chunks_seen += 1
+        if self.maybe_speech(chunk, level_db):
+            self.open_chunks = self.hangover_chunks
+        elif self.open_chunks > 0:
+            self.open_chunks -= 1
+
+        self.pending.append(chunk)
+        if len(self.pending) > self.pre_roll_chunks + 1:
+            self.chunks_dropped += len(self.pending) - self.pre_roll_chunks - 1
+            self.pending = self.pending[-(self.pre_roll_chunks + 1):]
+
+        if self.open_chunks == 0:
+            self.quiet_chunks += 1
+            if self.quiet_stride <= 0 or self.quiet_chunks % self.quiet_stride:
+                return None
+            # Quiet stride: only the newest chunk is scored
+            self.chunks_dropped += len(self.pending) - 1
+            self.pending = [chunk]
+        audio = self.pending[0] if len(self.pending) == 1 else np.concatenate(self.pending)
+        self.inferences += 1
+        self.chunks_scored += len(self.pending)
+        self.pending = []
+        return audio
+
+    def stats(self):
+        return {
+            "chunks_seen": self.chunks_seen,
+            "inferences": self.inferences,
+            "chunks_skipped": self.chunks_seen - self.chunks_scored,
+            "chunks_scored": self.chunks_scored,
+            "chunks_dropped": self.chunks_dropped,
+        }
@@ -10,6 +10,7 @@ from file_explorer_widget import FileExplorerWidget
 from projects import ProjectManager
 from Aidee import SimpleIDE
 from neumorphic_widgets import NeumorphicButton
+import startup_profiler
 
 
 class WelcomeWindow(QMainWindow):
@@ -195,7 +196,9 @@ class WelcomeWindow(QMainWindow):
         main_layout.addWidget(right_panel, 2)
         
     def open_main_window(self, project_path=None):
-        self.main_window = SimpleIDE(project_path)
+        with startup_profiler.span("SimpleIDE"):
+            self.main_window = SimpleIDE(project_path)
+        startup_profiler.watch_first_paint(self.main_window, "SimpleIDE")
         self.main_window.showMaximized()
         self.close()
     